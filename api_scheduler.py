@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+import discord
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # work a student is waiting on, e.g. their role grant
+PRIORITY_MAINTENANCE = 1  # permission restores after role changes
+PRIORITY_BULK = 2  # admin bulk jobs
+PRIORITY_COSMETIC = 3  # nice to have, e.g. hiding the verification channel
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_MAINTENANCE: "maintenance",
+    PRIORITY_BULK: "bulk",
+    PRIORITY_COSMETIC: "cosmetic"
+}
+
+
+class WaitStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class RateLimitCounter(logging.Handler):
+    """Counts the rate limit warnings discord.py logs while it retries 429s internally."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if "rate limited" in record.getMessage().lower():
+            self.count += 1
+
+
+class ApiScheduler:
+    """Runs mutating Discord API calls by priority, with per-route limits and retries.
+
+    A call whose route is at its limit is parked on that route instead of holding a worker,
+    and goes back on the queue when one of the route's calls finishes. Retries wait out
+    their backoff off the queue too, so neither blocks calls on other routes.
+    """
+
+    def __init__(self, workers=8, route_limits=None, default_route_limit=4, max_retries=4, base_delay=1.0):
+        self.workers = workers
+        self.route_limits = route_limits or {}
+        self.default_route_limit = default_route_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+        self._queue = None
+        self._tasks = []
+        self._seq = itertools.count()
+        self._active = {}
+        self._parked = {}
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = {}
+        self.waits = {priority: WaitStats() for priority in PRIORITY_NAMES}
+        self.library_rate_limits = RateLimitCounter()
+        logging.getLogger("discord.http").addHandler(self.library_rate_limits)
+
+    def queue_depth(self):
+        queued = self._queue.qsize() if self._queue else 0
+        return queued + sum(len(parked) for parked in self._parked.values())
+
+    def _start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _route_limit(self, route):
+        return self.route_limits.get(route, self.default_route_limit)
+
+    async def submit(self, route, call, priority=PRIORITY_INTERACTIVE):
+        """Queues call() (a function returning an awaitable) and waits for its result"""
+        if self._queue is None:
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        await self._queue.put((priority, next(self._seq), time.monotonic(), route, call, future, 0))
+        return await future
+
+    def run_later(self, route, call, priority=PRIORITY_COSMETIC):
+        """Queues a call without waiting for it, failures are only counted"""
+        task = asyncio.ensure_future(self.submit(route, call, priority))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                route, future = item[3], item[5]
+                if future.cancelled():
+                    continue
+                if self._active.get(route, 0) >= self._route_limit(route):
+                    heapq.heappush(self._parked.setdefault(route, []), item)
+                    continue
+                await self._run(item)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, item):
+        priority, seq, queued_at, route, call, future, attempt = item
+        if not attempt:
+            self.waits[priority].add(time.monotonic() - queued_at)
+        self._active[route] = self._active.get(route, 0) + 1
+        try:
+            result = await call()
+            if not future.done():
+                future.set_result(result)
+            self.completed += 1
+        except Exception as e:
+            delay = self._retry_delay(route, e, attempt)
+            if delay is None:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                # The route slot and the worker are free while the retry waits
+                self.retries += 1
+                asyncio.get_running_loop().call_later(
+                    delay, self._queue.put_nowait, (priority, seq, queued_at, route, call, future, attempt + 1)
+                )
+        finally:
+            self._active[route] -= 1
+            parked = self._parked.get(route)
+            if parked:
+                self._queue.put_nowait(heapq.heappop(parked))
+                if not parked:
+                    del self._parked[route]
+
+    def _retry_delay(self, route, e, attempt):
+        """Seconds to wait before retrying a failed call, None if it shouldn't be retried"""
+        if not isinstance(e, (discord.RateLimited, discord.HTTPException)):
+            return None
+        status = getattr(e, "status", 429)
+        if isinstance(e, discord.HTTPException) and status != 429 and status < 500:
+            return None
+        if status == 429:
+            self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+        if attempt >= self.max_retries:
+            return None
+        # Exponential backoff with jitter, never shorter than what Discord asked for
+        delay = self.base_delay * (2 ** attempt) * (0.5 + random.random())
+        return max(delay, getattr(e, "retry_after", 0) or 0)
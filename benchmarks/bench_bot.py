@@ -0,0 +1,263 @@
+"""Offline benchmark for the bot's hot paths, no Discord connection needed.
+
+    python benchmarks/bench_bot.py --members 10000 --roster 50000 --concurrency 500
+
+Runs in a temporary directory, so the real records and marks files are never touched.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeChannel, FakeContext, FakeGuild, FakeInteraction  # noqa: E402
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StallMonitor:
+    """Measures how late the event loop wakes up a task that asks to sleep 1 ms"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stalls = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.stalls.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self.stalls = []
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return {
+            "max_ms": max(self.stalls, default=0.0) * 1000,
+            "over_50ms": sum(1 for stall in self.stalls if stall > 0.05),
+            "total_over_10ms": sum(stall for stall in self.stalls if stall > 0.01) * 1000
+        }
+
+
+async def measure(name, calls, results):
+    """Runs the coroutine factories concurrently and records per-call latency"""
+    monitor = StallMonitor()
+    monitor.start()
+    latencies = []
+
+    async def timed(call):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    stalls = await monitor.stop()
+    results.append({
+        "name": name,
+        "calls": len(calls),
+        "seconds": elapsed,
+        "throughput": len(calls) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        **stalls
+    })
+
+
+def add_ack_result(name, acks, results):
+    """Adds a row for how long on_submit took to acknowledge, next to the full completion row"""
+    completed = results[-1]
+    results.append({
+        **completed,
+        "name": name,
+        "p50_ms": percentile(acks, 0.5) * 1000,
+        "p99_ms": percentile(acks, 0.99) * 1000
+    })
+
+
+def write_marks_file(path, student_ids):
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(["Student ID", "Name", "G-suit", "Section", "MARKS"])
+    for n, student_id in enumerate(student_ids):
+        sheet.append([int(student_id), f"Student {n}", f"s{n}@example.com", n % 40, n % 20])
+    wb.save(path)
+
+
+def print_results(results):
+    print()
+    header = f"{'benchmark':<28}{'calls':>7}{'secs':>9}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max stall ms':>14}{'stalls>50ms':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['name']:<28}{r['calls']:>7}{r['seconds']:>9.2f}{r['throughput']:>10.1f}"
+            f"{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>14.1f}{r['over_50ms']:>13}"
+        )
+
+
+async def run(args):
+    import bot as bot_module
+
+    sections = args.sections
+    guild = FakeGuild(api_latency=args.api_latency)
+    verification_channel = FakeChannel(guild, "verification")
+    guild.channels.append(verification_channel)
+
+    # Roster with `roster` IDs spread over the sections
+    started = time.perf_counter()
+    roster_ids = [str(20000000 + i) for i in range(args.roster)]
+    bot_module.roster.load(
+        (student_id, f"Section-{i % sections}", f"section-{i % sections}")
+        for i, student_id in enumerate(roster_ids)
+    )
+    print(f"Roster: {len(bot_module.roster)} IDs in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"about {bot_module.roster.memory_bytes() / 1024:.0f} KB")
+
+    members = [guild.add_member(f"member{i}") for i in range(args.members)]
+    admin = members[0]
+    concurrency = min(args.concurrency, len(members) - 1, len(roster_ids))
+    results = []
+
+    # Verification: `concurrency` different students submitting at once
+    submitters = members[1:concurrency + 1]
+
+    acks = []
+    shed = []
+
+    async def submit(modal, interaction):
+        # on_submit only defers, then the work finishes in modal.completion
+        started = time.perf_counter()
+        await modal.on_submit(interaction)
+        acks.append(time.perf_counter() - started)
+        if modal.completion is None:
+            shed.append(interaction)
+        else:
+            await modal.completion
+
+    def verify_call(member, student_id):
+        async def call():
+            modal = bot_module.VerifyModal()
+            modal.id_number._value = student_id
+            await submit(modal, FakeInteraction(guild, member, verification_channel))
+        return call
+
+    await measure(
+        "VerifyModal.on_submit",
+        [verify_call(member, roster_ids[i]) for i, member in enumerate(submitters)],
+        results
+    )
+    add_ack_result("VerifyModal ack", acks, results)
+    if shed:
+        print(f"{len(shed)} submissions turned away by INTERACTION_CONCURRENCY={bot_module.INTERACTION_CONCURRENCY}")
+    verified = sum(1 for member in submitters if len(member.roles) > 1)
+    print(f"Verified {verified}/{len(submitters)} members, {guild.api_calls} fake API calls")
+
+    # Duplicate submissions of already claimed IDs
+    others = members[concurrency + 1:2 * concurrency + 1]
+    acks.clear()
+    await measure(
+        "VerifyModal.on_submit (dup)",
+        [verify_call(member, roster_ids[i]) for i, member in enumerate(others)],
+        results
+    )
+    add_ack_result("VerifyModal ack (dup)", acks, results)
+
+    # Marks lookups for the verified students
+    write_marks_file(bot_module.MARKS_FILE, roster_ids[:max(concurrency, 1000)])
+    await bot_module.workbooks.run(bot_module.MARKS_FILE, bot_module.marks_store.reload_if_changed)
+
+    def marks_call(member, student_id):
+        async def call():
+            modal = bot_module.MarksModal()
+            modal.student_id._value = student_id
+            await submit(modal, FakeInteraction(guild, member, verification_channel))
+        return call
+
+    acks.clear()
+    await measure(
+        "MarksModal.on_submit",
+        [marks_call(member, roster_ids[i]) for i, member in enumerate(submitters)],
+        results
+    )
+    add_ack_result("MarksModal ack", acks, results)
+
+    # Record writes on their own
+    await measure(
+        "update_student_records",
+        [
+            (lambda member=member, student_id=roster_ids[i], section=f"Section-{i % sections}":
+                bot_module.update_student_records(member, student_id, section, bot_module.default_partition))
+            for i, member in enumerate(others)
+        ],
+        results
+    )
+    if not bot_module.records_db:
+        await measure("flush_student_records", [bot_module.flush_student_records], results)
+
+    # Admin commands
+    ctx = FakeContext(guild, admin, verification_channel)
+    await measure(
+        "check_verifications",
+        [lambda: bot_module.check_verifications.callback(ctx)],
+        results
+    )
+    await measure(
+        "check_verifications csv",
+        [lambda: bot_module.check_verifications.callback(ctx, "csv")],
+        results
+    )
+    await bot_module.reconcile_section_counters()
+    await measure(
+        "section_stats",
+        [lambda: bot_module.section_stats.callback(ctx) for _ in range(10)],
+        results
+    )
+
+    print_results(results)
+    bot_module.workbooks.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--roster", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Discord API call")
+    parser.add_argument("--backend", choices=["sqlite", "xlsx"], default="sqlite")
+    parser.add_argument("--interaction-limit", type=int, default=1000, help="INTERACTION_CONCURRENCY")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rolebot-bench-")
+    os.chdir(workdir)
+    os.environ["RECORDS_BACKEND"] = args.backend
+    os.environ["INTERACTION_CONCURRENCY"] = str(args.interaction_limit)
+    os.environ.pop("ROSTER_FILE", None)
+    os.environ.pop("METRICS_PORT", None)
+    print(f"Working in {workdir}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compares startup cost of the default member cache with LEAN_MEMBER_CACHE=1, offline.
+
+    python benchmarks/bench_member_cache.py --members 100000 --verified 5000 --active 1000
+
+Default mode builds every member the way discord.py does when it chunks a guild at startup.
+Lean mode builds only the verified members (pinned) and the recently active ones (LRU).
+--chunk-latency adds a per-chunk delay to stand in for receiving member chunks from Discord.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord  # noqa: E402
+from discord.state import ConnectionState  # noqa: E402
+
+from member_cache import MemberCache  # noqa: E402
+
+CHUNK_SIZE = 1000
+
+
+def make_state(lean):
+    intents = discord.Intents.default()
+    intents.members = True
+    options = {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()} if lean else {}
+    return ConnectionState(dispatch=lambda *args: None, handlers={}, hooks={}, http=None, intents=intents, **options)
+
+
+def guild_payload(member_count, sections):
+    roles = [{
+        "id": str(10 ** 17 + n), "name": "@everyone" if n == 0 else f"Section-{n}", "permissions": "0",
+        "position": n, "color": 0, "hoist": False, "managed": False, "mentionable": False
+    } for n in range(sections + 1)]
+    return {
+        "id": str(10 ** 17), "name": "Benchmark Guild", "roles": roles, "channels": [], "emojis": [],
+        "stickers": [], "features": [], "member_count": member_count, "owner_id": "1"
+    }
+
+
+def member_payload(n, sections):
+    return {
+        "user": {"id": str(2 * 10 ** 17 + n), "username": f"member{n}", "discriminator": "0",
+                 "avatar": None, "global_name": f"Member {n}"},
+        "roles": [str(10 ** 17 + 1 + n % sections)],
+        "joined_at": "2024-09-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0
+    }
+
+
+def build(lean, args):
+    """Returns (guild, member cache or None, number of chunks that would be requested)"""
+    state = make_state(lean)
+    guild = discord.Guild(data=guild_payload(args.members, args.sections), state=state)
+    if not lean:
+        # What the startup chunk requests do: every member, a chunk of 1000 at a time
+        chunks = 0
+        for start in range(0, args.members, CHUNK_SIZE):
+            for n in range(start, min(start + CHUNK_SIZE, args.members)):
+                guild._add_member(discord.Member(data=member_payload(n, args.sections), guild=guild, state=state))
+            chunks += 1
+            if args.chunk_latency:
+                time.sleep(args.chunk_latency)
+        return guild, None, chunks
+
+    cache = MemberCache(args.cache_size)
+    # Verified members are fetched 100 per request, then everyone else is cached as they interact
+    chunks = 0
+    for start in range(0, args.verified, 100):
+        for n in range(start, min(start + 100, args.verified)):
+            cache.pin(discord.Member(data=member_payload(n, args.sections), guild=guild, state=state))
+        chunks += 1
+        if args.chunk_latency:
+            time.sleep(args.chunk_latency)
+    for n in range(args.verified, args.verified + args.active):
+        cache.touch(discord.Member(data=member_payload(n, args.sections), guild=guild, state=state))
+    return guild, cache, chunks
+
+
+def measure(lean, args):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    guild, cache, chunks = build(lean, args)
+    seconds = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": "lean" if lean else "default",
+        "cached": len(guild._members),
+        "requests": chunks,
+        "seconds": seconds,
+        "current_mb": current / 2 ** 20,
+        "peak_mb": peak / 2 ** 20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=100000)
+    parser.add_argument("--verified", type=int, default=5000)
+    parser.add_argument("--active", type=int, default=1000, help="members who interact after startup")
+    parser.add_argument("--cache-size", type=int, default=1000, help="MEMBER_CACHE_SIZE")
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="seconds per member chunk")
+    args = parser.parse_args()
+
+    results = [measure(False, args), measure(True, args)]
+    header = f"{'mode':<10}{'cached':>10}{'requests':>10}{'secs':>9}{'MB held':>10}{'MB peak':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['cached']:>10}{r['requests']:>10}{r['seconds']:>9.2f}"
+            f"{r['current_mb']:>10.1f}{r['peak_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
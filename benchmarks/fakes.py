@@ -0,0 +1,223 @@
+"""In-process stand-ins for the parts of discord.py the bot touches.
+
+API calls sleep for `api_latency` seconds to stand in for a round trip to Discord.
+"""
+import asyncio
+import itertools
+
+import discord
+
+_ids = itertools.count(10 ** 17)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakeRole:
+    def __init__(self, guild, name, role_id=None):
+        self.guild = guild
+        self.name = name
+        self.id = role_id or next_id()
+
+    def __repr__(self):
+        return f"<FakeRole {self.name}>"
+
+
+class FakeChannel:
+    def __init__(self, guild, name, overwrites=None):
+        self.guild = guild
+        self.name = name
+        self.id = next_id()
+        self._overwrites = dict(overwrites or {})
+
+    @property
+    def overwrites(self):
+        return dict(self._overwrites)
+
+    def overwrites_for(self, target):
+        return self._overwrites.get(target, discord.PermissionOverwrite())
+
+    async def set_permissions(self, target, *, overwrite=None, reason=None, **permissions):
+        await asyncio.sleep(self.guild.api_latency)
+        self.guild.api_calls += 1
+        if overwrite is None and not permissions:
+            self._overwrites.pop(target, None)
+        else:
+            self._overwrites[target] = overwrite or discord.PermissionOverwrite(**permissions)
+
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(self, content, **kwargs)
+
+
+class FakeMember:
+    def __init__(self, guild, name, member_id=None):
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.id = member_id or next_id()
+        self.roles = [guild.default_role]
+
+    def __repr__(self):
+        return f"<FakeMember {self.name}>"
+
+    async def add_roles(self, *roles, reason=None):
+        await asyncio.sleep(self.guild.api_latency)
+        self.guild.api_calls += 1
+        for role in roles:
+            if role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, reason=None):
+        await asyncio.sleep(self.guild.api_latency)
+        self.guild.api_calls += 1
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class FakeGuild:
+    def __init__(self, api_latency=0.05):
+        self.id = next_id()
+        self.name = "Benchmark Guild"
+        self.api_latency = api_latency
+        self.api_calls = 0
+        self.default_role = FakeRole(self, "@everyone", self.id)
+        self.roles = [self.default_role]
+        self.channels = []
+        self._members = {}
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def member_count(self):
+        return len(self._members)
+
+    def add_member(self, name):
+        member = FakeMember(self, name)
+        self._members[member.id] = member
+        return member
+
+    def _add_member(self, member):
+        self._members[member.id] = member
+
+    def _remove_member(self, member):
+        self._members.pop(member.id, None)
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_member_named(self, name):
+        for member in self._members.values():
+            if member.name == name:
+                return member
+        return None
+
+    async def fetch_member(self, member_id):
+        await asyncio.sleep(self.api_latency)
+        self.api_calls += 1
+        member = self._members.get(member_id)
+        if member is None:
+            raise discord.NotFound(FakeHTTPResponse(404), "Unknown Member")
+        return member
+
+    async def query_members(self, *, user_ids=None, cache=True, **kwargs):
+        await asyncio.sleep(self.api_latency)
+        return [self._members[user_id] for user_id in user_ids or () if user_id in self._members]
+
+    async def create_role(self, *, name, reason=None):
+        await asyncio.sleep(self.api_latency)
+        self.api_calls += 1
+        role = FakeRole(self, name)
+        self.roles.append(role)
+        return role
+
+    async def create_text_channel(self, name, *, overwrites=None, reason=None):
+        await asyncio.sleep(self.api_latency)
+        self.api_calls += 1
+        channel = FakeChannel(self, name, overwrites)
+        self.channels.append(channel)
+        return channel
+
+
+class FakeHTTPResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Fake"
+        self.headers = {}
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, **kwargs):
+        self.channel = channel
+        self.id = next_id()
+        self.content = content
+        self.kwargs = kwargs
+
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+    async def delete(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        if self._done:
+            raise RuntimeError("interaction already responded to")
+        self._done = True
+        self._interaction.messages.append(content or kwargs.get("embed"))
+
+    async def defer(self, **kwargs):
+        if self._done:
+            raise RuntimeError("interaction already responded to")
+        self._done = True
+        self._interaction.deferred = True
+
+    async def send_modal(self, modal):
+        self._done = True
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self._interaction.messages.append(content or kwargs.get("embed"))
+
+
+class FakeInteraction:
+    def __init__(self, guild, user, channel):
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.id = next_id()
+        self.messages = []
+        self.deferred = False
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeContext:
+    """Enough of commands.Context for calling a command's callback directly"""
+
+    def __init__(self, guild, author, channel):
+        self.guild = guild
+        self.author = author
+        self.channel = channel
+        self.message = FakeMessage(channel, "")
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeMessage(self.channel, content, **kwargs)
@@ -1,24 +1,407 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import ui, ButtonStyle
 from discord.ui import Button, View
 import json
+import csv
 import os
+import tempfile
+import time
 from dotenv import load_dotenv
 import logging
 import asyncio  # Add this import for sleep
-import openpyxl  # Add this import at the top
+from datetime import datetime
 from id_config import ID_MAPPING
+from marks_store import MarksStore
+import marks_analytics
+from roster import RosterIndex
+from claims import ClaimRegistry, SqliteClaimRegistry
+from workbook_io import WorkbookExecutor
+from journal import RecordJournal
+from records_db import StudentRecordsDB
+from section_counters import SectionCounters
+from guild_config import GuildPartition, GuildPartitions
+import records
+import bulk_import
+from guild_cache import GuildObjectCache
+from update_coalescer import UpdateCoalescer
+from member_cache import MemberCache
+from metrics import Metrics
+from log_pipeline import log_event, parse_settings, setup_logging
+from api_scheduler import (
+    ApiScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_MAINTENANCE,
+    PRIORITY_BULK,
+    PRIORITY_COSMETIC,
+    PRIORITY_NAMES
+)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+load_dotenv()
+
+# Logs are formatted and written by a background thread, see main(). LOG_FORMAT=json
+# writes one JSON object per line. LOG_SAMPLING and LOG_RATE_LIMITS take
+# "event=value" pairs to thin out chatty events.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLING = parse_settings(os.getenv('LOG_SAMPLING', 'message_received=0.01'))
+LOG_RATE_LIMITS = parse_settings(os.getenv('LOG_RATE_LIMITS', 'message_received=5'))
 
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# LEAN_MEMBER_CACHE=1 skips downloading every member at startup. Only verified members
+# and the MEMBER_CACHE_SIZE most recently active ones are cached, others are fetched when needed.
+LEAN_MEMBER_CACHE = os.getenv('LEAN_MEMBER_CACHE', '0') == '1'
+MEMBER_CACHE_SIZE = int(os.getenv('MEMBER_CACHE_SIZE', '1000'))
+member_cache = MemberCache(MEMBER_CACHE_SIZE) if LEAN_MEMBER_CACHE else None
+
+# SHARD_COUNT runs the bot as an AutoShardedBot. launcher.py sets it, together with the
+# SHARD_IDS this process runs, when the shards are spread over several processes.
+# SHARD_COUNT=auto lets Discord pick the count for a single process.
+SHARD_COUNT = os.getenv('SHARD_COUNT')
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()]
+
+bot_options = {}
+if LEAN_MEMBER_CACHE:
+    bot_options.update(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+if SHARD_COUNT:
+    if SHARD_COUNT != 'auto':
+        bot_options['shard_count'] = int(SHARD_COUNT)
+    if SHARD_IDS:
+        bot_options['shard_ids'] = SHARD_IDS
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents, **bot_options)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, **bot_options)
+
+# Latency histograms and outcome counters. METRICS_PORT serves them for Prometheus,
+# METRICS_ENABLED=0 turns all recording into no-ops.
+metrics = Metrics(enabled=os.getenv('METRICS_ENABLED', '1') != '0')
+METRICS_PORT = os.getenv('METRICS_PORT')
+metrics_runner = None
+
+# Every call that changes guild state goes through here, so a student's role
+# grant isn't stuck behind cosmetic permission edits during a burst
+api = ApiScheduler(
+    workers=int(os.getenv('API_WORKERS', '8')),
+    route_limits={
+        "add_roles": 8,
+        "create_role": 1,
+        "create_channel": 1,
+        "set_permissions": 2,
+        "delete_message": 2
+    }
+)
+
+# Roles and channels by name, so lookups don't scan guild.roles/guild.channels
+guild_cache = GuildObjectCache()
+
+# All openpyxl work runs here so it never blocks the event loop
+workbooks = WorkbookExecutor(
+    max_workers=int(os.getenv('WORKBOOK_WORKERS', '4')),
+    on_job=lambda job, seconds: metrics.observe("workbook_job_seconds", seconds, job=job)
+)
+
+# Student records live in SQLite by default. RECORDS_BACKEND=xlsx keeps the
+# students*.xlsx files as the system of record instead.
+RECORDS_BACKEND = os.getenv('RECORDS_BACKEND', 'sqlite')
+if SHARD_IDS and RECORDS_BACKEND != 'sqlite':
+    # The xlsx files and journal belong to a single process
+    log_event("records_backend_overridden", logging.WARNING, requested=RECORDS_BACKEND, used="sqlite")
+    RECORDS_BACKEND = 'sqlite'
+records_db = StudentRecordsDB('student_records.db') if RECORDS_BACKEND == 'sqlite' else None
+
+# With the xlsx backend, updates are journaled right away and written to the workbooks in batches
+RECORDS_FLUSH_SECONDS = int(os.getenv('RECORDS_FLUSH_SECONDS', '10'))
+journal = RecordJournal('records_journal.jsonl')
+
+# VERIFICATION_GATING=role hides the verification channel with a single overwrite
+# for the Verified role instead of one overwrite per verified member
+VERIFICATION_GATING = os.getenv('VERIFICATION_GATING', 'overwrite')
+VERIFIED_ROLE_NAME = os.getenv('VERIFIED_ROLE_NAME', 'Verified')
+VERIFICATION_CHANNEL_NAME = 'verification'
+MIGRATION_BATCH_SIZE = 50
+
+# Bulk verification runs this many members at once, spaced to stay under Discord's rate limits
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '5'))
+BULK_REQUESTS_PER_SECOND = float(os.getenv('BULK_REQUESTS_PER_SECOND', '10'))
+
+# Section statistics are counted in memory and recounted only when the records change
+STATS_RECONCILE_SECONDS = int(os.getenv('STATS_RECONCILE_SECONDS', '60'))
+section_counters = SectionCounters()
+
+# Marks are parsed once and reloaded only when markst.xlsx changes
+MARKS_FILE = 'markst.xlsx'
+MARKS_RELOAD_SECONDS = 30
+marks_store = MarksStore(MARKS_FILE)
+
+# Role/ID lookup tables, built from ID_MAPPING or from the ROSTER_FILE csv/xlsx when set
+ROSTER_FILE = os.getenv('ROSTER_FILE')
+ROSTER_RELOAD_SECONDS = int(os.getenv('ROSTER_RELOAD_SECONDS', '60'))
+roster = RosterIndex(ID_MAPPING)
+
+# Modal submissions are deferred at once and finished in the background. Past
+# INTERACTION_CONCURRENCY unfinished ones, new submissions are turned away.
+INTERACTION_CONCURRENCY = int(os.getenv('INTERACTION_CONCURRENCY', '200'))
+interaction_tasks = set()
+
+# Which Discord user has claimed which student ID. CLAIMS_BACKEND=sqlite shares the
+# claims between processes, and is required when launcher.py runs several.
+CLAIMS_BACKEND = os.getenv('CLAIMS_BACKEND', 'sqlite' if SHARD_IDS else 'json')
+if SHARD_IDS and CLAIMS_BACKEND != 'sqlite':
+    # Each process would keep its own copy of claimed_ids.json and overwrite the others
+    log_event("claims_backend_overridden", logging.WARNING, requested=CLAIMS_BACKEND, used="sqlite")
+    CLAIMS_BACKEND = 'sqlite'
+
+def make_claims(directory=''):
+    if CLAIMS_BACKEND == 'sqlite':
+        return SqliteClaimRegistry(
+            os.path.join(directory, 'claims.db'),
+            legacy_path=os.path.join(directory, 'claimed_ids.json')
+        )
+    return ClaimRegistry(os.path.join(directory, 'claimed_ids.json'))
+
+claims = make_claims()
+
+# GUILD_CONFIG_FILE lists guilds with their own roster, marks file and records directory.
+# Their data is loaded on first use and dropped after PARTITION_IDLE_SECONDS unused.
+# Every other guild shares the roster, marks and records above.
+GUILD_CONFIG_FILE = os.getenv('GUILD_CONFIG_FILE', 'guilds.json')
+PARTITION_IDLE_SECONDS = int(os.getenv('PARTITION_IDLE_SECONDS', '1800'))
+default_partition = GuildPartition(roster, marks_store, claims, records_db, section_counters, ROSTER_FILE)
+guild_partitions = GuildPartitions(
+    GUILD_CONFIG_FILE,
+    default_partition,
+    workbooks.run,
+    make_claims,
+    ID_MAPPING,
+    PARTITION_IDLE_SECONDS,
+    on_load=lambda guild_id, part: partition_loaded(guild_id, part)
+)
+
+async def claims_call(func, *args):
+    """Calls a claims registry method, on the workbook executor when it goes to the database"""
+    registry = func.__self__
+    if registry.blocking:
+        return await workbooks.run(registry.path, func, *args)
+    return func(*args)
+
+# Claims saves run in the background, one per registry at a time. Changes made while one is
+# running are written by the next, so a burst of verifications costs a few rewrites, not one each.
+claims_writers = {}
+
+def save_claims_later(registry):
+    """Persists a registry's changes without making the caller wait for the file rewrite"""
+    if not registry.dirty or id(registry) in claims_writers:
+        return
+    claims_writers[id(registry)] = asyncio.create_task(write_claims(registry))
+
+async def write_claims(registry):
+    try:
+        while registry.dirty:
+            await asyncio.to_thread(registry.save)
+    except Exception:
+        log_event("claims_save_failed", logging.ERROR, exc_info=True, file=registry.path)
+    finally:
+        del claims_writers[id(registry)]
+
+async def resolve_verified_id(member, part):
+    """Returns the student ID a member verified with, or None"""
+    verified_id = await claims_call(part.claims.student_for, member.id)
+    if verified_id:
+        # Only counts while the ID is on the roster and the member still holds its role
+        mapping = part.roster.lookup(verified_id)
+        if mapping and any(role.name == mapping["role"] for role in member.roles):
+            return verified_id
+        return None
+
+    # Fall back to the member's role, only possible when that role belongs to a single ID
+    for role in member.roles:
+        if part.roster.role_size(role.name) == 1:
+            return part.roster.ids_for_role(role.name)[0]
+    return None
+
+async def load_claims():
+    """Reads (Student ID, Discord ID) claims from the claims store.
+
+    Only before the store has ever been saved are the active student records merged in. After
+    that a released claim would come back from its record, which stays Active.
+    """
+    pairs = await claims_call(claims.load)
+    if await claims_call(claims.seeded):
+        return pairs
+    if records_db:
+        pairs.extend(await workbooks.run(records_db.path, records_db.active_claims))
+        return pairs
+    for filename in records.section_files():
+        pairs.extend(await workbooks.run(filename, records.read_active_claims, filename))
+    return pairs
+
+async def import_student_workbooks():
+    """Copies students*.xlsx files into the records database, once per file"""
+    for filename in records.section_files():
+        imported = await workbooks.run(
+            records_db.path,
+            records_db.import_workbook,
+            filename,
+            records.filename_section(filename)
+        )
+        if imported is not None:
+            log_event("records_imported", file=filename, records=imported)
+
+async def flush_student_records():
+    """Writes pending journal entries, one save per section workbook"""
+    flushed = 0
+    for filename in journal.files():
+        entries = journal.take(filename)
+        await workbooks.run(filename, records.apply_student_records, filename, entries)
+        journal.mark_flushed(filename, entries)
+        flushed += len(entries)
+        log_event("records_flushed", file=filename, changes=len(entries))
+    if flushed:
+        await workbooks.run(journal.path, journal.compact)
+    return flushed
+
+@tasks.loop(seconds=RECORDS_FLUSH_SECONDS)
+async def flush_records_task():
+    try:
+        await flush_student_records()
+    except Exception:
+        log_event("records_flush_failed", logging.ERROR, exc_info=True)
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+async def reconcile_database_counters(part):
+    """Recounts a partition's sections if its records database changed since it was last counted"""
+    db, counters = part.records_db, part.section_counters
+    fingerprint = (file_mtime(db.path), file_mtime(f"{db.path}-wal"))
+    if counters.has_changed(db.path, fingerprint):
+        statuses = await workbooks.run(db.path, db.statuses)
+        for section in set(counters.sections()) - set(statuses):
+            counters.remove_section(section)
+        for section, section_statuses in statuses.items():
+            counters.replace_section(section, section_statuses)
+
+async def reconcile_section_counters():
+    """Recounts sections whose records changed since they were last counted"""
+    if records_db:
+        await reconcile_database_counters(default_partition)
+        return
+
+    filenames = set(records.section_files())
+    for filename in section_counters.sources():
+        if filename not in filenames:
+            section_counters.forget(filename)
+            section_counters.remove_section(records.filename_section(filename))
+    for filename in filenames:
+        if section_counters.has_changed(filename, file_mtime(filename)):
+            statuses = await workbooks.run(filename, records.read_statuses, filename)
+            # Journaled updates that haven't been flushed yet still count
+            for entry in journal.take(filename):
+                statuses[entry["student_id"]] = True
+            section_counters.replace_section(records.filename_section(filename), statuses)
+
+@tasks.loop(seconds=STATS_RECONCILE_SECONDS)
+async def reconcile_counters_task():
+    try:
+        await reconcile_section_counters()
+    except Exception:
+        log_event("section_count_failed", logging.ERROR, exc_info=True)
+
+def roster_summary(index=roster):
+    return (
+        f"{len(index)} IDs loaded in {index.load_seconds * 1000:.0f} ms, "
+        f"about {index.memory_bytes() / 1024:.0f} KB"
+    )
+
+def log_roster_loaded():
+    log_event(
+        "roster_loaded",
+        file=ROSTER_FILE,
+        ids=len(roster),
+        load_ms=round(roster.load_seconds * 1000),
+        memory_kb=round(roster.memory_bytes() / 1024)
+    )
+
+async def reload_roster(force=False):
+    """Reloads ROSTER_FILE off the event loop, returns True if a new roster was swapped in"""
+    if force:
+        await workbooks.run(ROSTER_FILE, roster.load_file, ROSTER_FILE)
+        return True
+    return await workbooks.run(ROSTER_FILE, roster.reload_if_changed, ROSTER_FILE)
+
+@tasks.loop(seconds=ROSTER_RELOAD_SECONDS)
+async def watch_roster_file():
+    try:
+        if await reload_roster():
+            log_roster_loaded()
+    except Exception:
+        log_event("roster_reload_failed", logging.ERROR, exc_info=True, file=ROSTER_FILE)
+
+@tasks.loop(seconds=MARKS_RELOAD_SECONDS)
+async def watch_marks_file():
+    try:
+        if await workbooks.run(MARKS_FILE, marks_store.reload_if_changed):
+            log_event("marks_loaded", file=MARKS_FILE, students=len(marks_store))
+    except Exception:
+        log_event("marks_reload_failed", logging.ERROR, exc_info=True, file=MARKS_FILE)
+
+@tasks.loop(seconds=60)
+async def maintain_guild_partitions():
+    """Drops idle guild partitions, and picks up roster, marks and records changes in the others"""
+    for guild_id in guild_partitions.evict_idle():
+        log_event("partition_evicted", guild_id=guild_id)
+    for guild_id, part in guild_partitions.loaded().items():
+        try:
+            await workbooks.run(part.records_db.path, part.refresh)
+            await reconcile_database_counters(part)
+        except Exception:
+            log_event("partition_refresh_failed", logging.ERROR, exc_info=True, guild_id=guild_id)
+
+def partition_loaded(guild_id, part):
+    log_event("partition_loaded", guild_id=guild_id, roster_ids=len(part.roster), marks=len(part.marks_store))
+    guild = bot.get_guild(guild_id)
+    if member_cache and guild:
+        asyncio.create_task(cache_verified_members(guild))
+
+async def acknowledge(interaction, kind):
+    """Defers a modal submission straight away, well inside Discord's 3 second window.
+
+    Returns False, after telling the user, if INTERACTION_CONCURRENCY submissions are
+    already being worked on.
+    """
+    if len(interaction_tasks) >= INTERACTION_CONCURRENCY:
+        metrics.inc(f"{kind}_outcomes_total", outcome="shed")
+        await interaction.response.send_message(
+            "The bot is handling a lot of requests right now. Please try again in a minute.",
+            ephemeral=True
+        )
+        return False
+    with metrics.timer("interaction_ack_seconds", kind=kind):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+    return True
+
+def start_interaction_task(coro):
+    """Finishes a deferred interaction in the background, tracked in interaction_tasks"""
+    task = asyncio.ensure_future(coro)
+    interaction_tasks.add(task)
+    task.add_done_callback(interaction_tasks.discard)
+    return task
+
+async def reply(interaction, content=None, **kwargs):
+    """Sends an ephemeral message, as a followup once the interaction has been deferred"""
+    if content is not None:
+        kwargs["content"] = content
+    if interaction.response.is_done():
+        await interaction.followup.send(ephemeral=True, **kwargs)
+    else:
+        await interaction.response.send_message(ephemeral=True, **kwargs)
 
 class VerifyView(discord.ui.View):
     def __init__(self):
@@ -29,8 +412,8 @@ class VerifyView(discord.ui.View):
         try:
             modal = VerifyModal()
             await interaction.response.send_modal(modal)
-        except Exception as e:
-            print(f"Button error: {e}")
+        except Exception:
+            log_event("verify_button_failed", logging.ERROR, exc_info=True, user_id=interaction.user.id)
             await interaction.response.send_message("An error occurred. Please try again.", ephemeral=True)
 
 class VerifyModal(discord.ui.Modal):
@@ -44,127 +427,308 @@ class VerifyModal(discord.ui.Modal):
             max_length=10
         )
         self.add_item(self.id_number)
+        self.completion = None
 
     async def on_submit(self, interaction: discord.Interaction):
+        if await acknowledge(interaction, "verify"):
+            self.completion = start_interaction_task(self.complete(interaction))
+
+    async def complete(self, interaction):
+        with metrics.timer("verify_seconds"):
+            outcome = await self.verify(interaction)
+        metrics.inc("verify_outcomes_total", outcome=outcome)
+
+    async def verify(self, interaction):
+        """Runs the verification and returns its outcome for the metrics"""
         try:
             id_input = str(self.id_number.value)
             member = interaction.user
             guild = interaction.guild
+            part = await guild_partitions.get(guild.id)
 
             # Check if user already has a section role
             has_section = False
             for role in member.roles:
                 if role.name.startswith("Section-"):
-                    await interaction.response.send_message(
-                        f"You are already assigned to {role.name}. You cannot be in multiple sections!",
-                        ephemeral=True
-                    )
-                    return
-
-            # Check if this ID is already in use by another member
-            role_to_check = ID_MAPPING.get(id_input, {}).get("role")
-            if role_to_check:
-                for guild_member in guild.members:
-                    if guild_member != member:  # Don't check the current user
-                        member_roles = [role.name for role in guild_member.roles]
-                        if role_to_check in member_roles:
-                            await interaction.response.send_message(
-                                "This ID is already verified with another user. Please contact an administrator if you think this is a mistake.",
-                                ephemeral=True
-                            )
-                            return
-
-            if id_input in ID_MAPPING:
-                mapping = ID_MAPPING[id_input]
-                role_name = mapping["role"]
-                channel_name = mapping["channel"]
-                
-                # Get or create role
-                role = discord.utils.get(interaction.guild.roles, name=role_name)
-                if not role:
-                    role = await interaction.guild.create_role(name=role_name)
-                
-                # Assign role
-                await member.add_roles(role)
-                success_message = f"Successfully verified! You have been assigned to {role_name}"
-
-                # Handle channel
-                if channel_name:
-                    channel = discord.utils.get(interaction.guild.channels, name=channel_name)
-                    if not channel:
-                        overwrites = {
-                            interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                            role: discord.PermissionOverwrite(
-                                read_messages=True,
-                                send_messages=True,
-                                read_message_history=True
-                            )
-                        }
-                        channel = await interaction.guild.create_text_channel(
-                            channel_name,
-                            overwrites=overwrites
-                        )
-                    success_message += f" with access to #{channel_name}"
+                    await reply(interaction, f"You are already assigned to {role.name}. You cannot be in multiple sections!")
+                    return "already_assigned"
+
+            mapping = part.roster.lookup(id_input)
+            if mapping:
+                # Claim the ID, this fails if it is already in use by another member
+                with metrics.timer("verify_phase_seconds", phase="duplicate_check"):
+                    claimed = await claims_call(part.claims.claim, id_input, member.id)
+                if not claimed:
+                    await reply(interaction, "This ID is already verified with another user. Please contact an administrator if you think this is a mistake.")
+                    return "duplicate"
+
+                try:
+                    extra_roles = []
+                    if VERIFICATION_GATING == 'role':
+                        with metrics.timer("verify_phase_seconds", phase="role_resolve"):
+                            extra_roles.append(await ensure_verification_gate(guild, interaction.channel))
+                    success_message = await assign_section(guild, member, mapping, extra_roles)
+                except Exception:
+                    # Give the ID back so the student can retry
+                    await claims_call(part.claims.release, id_input, member.id)
+                    raise
+
+                if member_cache:
+                    member_cache.pin(member)
+
+                save_claims_later(part.claims)
 
                 # Update student records
-                record_updated = await update_student_records(
-                    member,
-                    id_input,
-                    role_name
-                )
+                with metrics.timer("verify_phase_seconds", phase="record_write"):
+                    record_updated = await update_student_records(
+                        member,
+                        id_input,
+                        mapping["role"],
+                        part
+                    )
                 
                 if record_updated:
                     success_message += "\nYour information has been recorded."
 
-                await interaction.response.send_message(success_message, ephemeral=True)
+                with metrics.timer("verify_phase_seconds", phase="response"):
+                    await reply(interaction, success_message)
 
-                # Try to hide verification channel
-                try:
+                # Try to hide verification channel, queued behind anything more urgent
+                if VERIFICATION_GATING != 'role':
                     verification_channel = interaction.channel
-                    await verification_channel.set_permissions(member,
+                    api.run_later("set_permissions", lambda: verification_channel.set_permissions(member,
                         read_messages=False,
                         send_messages=False
-                    )
-                except:
-                    pass
+                    ), PRIORITY_COSMETIC)
+                return "success"
 
             else:
-                await interaction.response.send_message(
-                    "Invalid ID number! Please try again with a valid ID.",
-                    ephemeral=True
-                )
+                await reply(interaction, "Invalid ID number! Please try again with a valid ID.")
+                return "invalid_id"
 
-        except Exception as e:
-            print(f"Verification error: {e}")
-            if not interaction.response.is_done():
-                await interaction.response.send_message(
-                    "An error occurred. Please try again or contact an administrator.",
-                    ephemeral=True
-                )
+        except Exception:
+            log_event("verification_failed", logging.ERROR, exc_info=True, user_id=interaction.user.id)
+            await reply(interaction, "An error occurred. Please try again or contact an administrator.")
+            return "error"
+
+async def get_or_create_role(guild, role_name, priority=PRIORITY_INTERACTIVE):
+    role = guild_cache.role(guild, role_name)
+    if role:
+        return role
+
+    async def create():
+        role = await api.submit("create_role", lambda: guild.create_role(name=role_name), priority)
+        guild_cache.add_role(role)
+        return role
+
+    # Students of a new section verifying at once share a single create_role call
+    return await guild_cache.single_flight((guild.id, "role", role_name), create)
+
+async def ensure_section_channel(guild, channel_name, role, priority=PRIORITY_INTERACTIVE):
+    """Creates the private channel for a section role if it doesn't exist yet"""
+    channel = guild_cache.channel(guild, channel_name)
+    if channel:
+        return channel
+
+    async def create():
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            role: discord.PermissionOverwrite(
+                read_messages=True,
+                send_messages=True,
+                read_message_history=True
+            )
+        }
+        channel = await api.submit("create_channel", lambda: guild.create_text_channel(
+            channel_name,
+            overwrites=overwrites
+        ), priority)
+        guild_cache.add_channel(channel)
+        return channel
+
+    return await guild_cache.single_flight((guild.id, "channel", channel_name), create)
+
+async def ensure_verification_gate(guild, channel, priority=PRIORITY_INTERACTIVE):
+    """Makes sure the Verified role can't see the verification channel, returns the role"""
+    verified_role = await get_or_create_role(guild, VERIFIED_ROLE_NAME, priority)
+    overwrite = channel.overwrites_for(verified_role)
+    if overwrite.read_messages is not False or overwrite.send_messages is not False:
+        await api.submit("set_permissions", lambda: channel.set_permissions(verified_role,
+            read_messages=False,
+            send_messages=False
+        ), priority)
+    return verified_role
+
+async def assign_section(guild, member, mapping, extra_roles=()):
+    """Gives the member the role and channel for their ID, plus any extra roles in the same call"""
+    role_name = mapping["role"]
+    channel_name = mapping["channel"]
+    
+    # Get or create role
+    with metrics.timer("verify_phase_seconds", phase="role_resolve"):
+        role = await get_or_create_role(guild, role_name)
+    
+    # Assign role
+    with metrics.timer("verify_phase_seconds", phase="add_roles"):
+        await api.submit("add_roles", lambda: member.add_roles(role, *extra_roles), PRIORITY_INTERACTIVE)
+    success_message = f"Successfully verified! You have been assigned to {role_name}"
+
+    # Handle channel
+    if channel_name:
+        with metrics.timer("verify_phase_seconds", phase="channel_resolve"):
+            await ensure_section_channel(guild, channel_name, role)
+        success_message += f" with access to #{channel_name}"
+
+    return success_message
 
 @bot.event
 async def on_ready():
-    print(f'Logged in as {bot.user.name} (ID: {bot.user.id})')
-    print(f'Connected to {len(bot.guilds)} guilds:')
+    log_event("ready", user=bot.user.name, user_id=bot.user.id, guilds=len(bot.guilds))
     for guild in bot.guilds:
-        print(f'- {guild.name} (ID: {guild.id})')
-    print('------')
+        log_event("guild_connected", guild=guild.name, guild_id=guild.id)
+
+    guild_cache.clear()
+
+    global metrics_runner
+    if METRICS_PORT and metrics.enabled and metrics_runner is None:
+        try:
+            metrics_runner = await metrics.start_http_server(port=int(METRICS_PORT))
+            log_event("metrics_server_started", url=f"http://127.0.0.1:{METRICS_PORT}/metrics")
+        except Exception:
+            log_event("metrics_server_failed", logging.ERROR, exc_info=True, port=METRICS_PORT)
+
+    if ROSTER_FILE and not watch_roster_file.is_running():
+        try:
+            await reload_roster()
+            log_roster_loaded()
+        except Exception:
+            log_event("roster_load_failed", logging.ERROR, exc_info=True, file=ROSTER_FILE)
+        watch_roster_file.start()
+
+    if records_db:
+        try:
+            await import_student_workbooks()
+        except Exception:
+            log_event("records_import_failed", logging.ERROR, exc_info=True)
+    elif not flush_records_task.is_running():
+        # Pick up anything that was journaled but not written before the last shutdown
+        try:
+            replayed = await workbooks.run(journal.path, journal.replay)
+            if replayed:
+                log_event("journal_replayed", updates=replayed)
+        except Exception:
+            log_event("journal_replay_failed", logging.ERROR, exc_info=True)
+        flush_records_task.start()
+
+    try:
+        await claims_call(claims.rebuild, await load_claims())
+        await asyncio.to_thread(claims.save)
+        log_event("claims_loaded", claims=await claims_call(claims.__len__))
+    except Exception:
+        log_event("claims_load_failed", logging.ERROR, exc_info=True)
+
+    if member_cache:
+        member_cache.clear()
+        for guild in bot.guilds:
+            asyncio.create_task(cache_verified_members(guild))
+
+    if not reconcile_counters_task.is_running():
+        reconcile_counters_task.start()
+
+    if not watch_marks_file.is_running():
+        watch_marks_file.start()
+
+    if guild_partitions.configured_count() and not maintain_guild_partitions.is_running():
+        maintain_guild_partitions.start()
+
+async def cache_verified_members(guild):
+    """Lean mode: caches the members holding a claim, so role removals still reach on_member_update"""
+    started = time.perf_counter()
+    # Guilds whose partition isn't loaded yet are warmed by partition_loaded()
+    part = guild_partitions.peek(guild.id)
+    member_ids = [member_id for _, member_id in await claims_call(part.claims.items)] if part else []
+    cached = 0
+    try:
+        for i in range(0, len(member_ids), 100):
+            for member in await guild.query_members(user_ids=member_ids[i:i + 100], cache=False):
+                member_cache.pin(member)
+                cached += 1
+    except Exception:
+        log_event("member_cache_warm_failed", logging.ERROR, exc_info=True, guild_id=guild.id)
+    log_event(
+        "member_cache_warmed",
+        guild_id=guild.id,
+        members=cached,
+        seconds=round(time.perf_counter() - started, 2)
+    )
+
+@bot.event
+async def on_guild_role_create(role):
+    guild_cache.add_role(role)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name:
+        guild_cache.rename_role(before, after)
+
+@bot.event
+async def on_guild_role_delete(role):
+    guild_cache.remove_role(role)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    guild_cache.add_channel(channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if before.name != after.name:
+        guild_cache.rename_channel(before, after)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_cache.remove_channel(channel)
+
+@bot.event
+async def on_guild_available(guild):
+    # The library rebuilds guild objects after an outage, so rebuild the lookups too
+    guild_cache.clear(guild.id)
+    if member_cache and bot.is_ready():
+        member_cache.clear(guild.id)
+        asyncio.create_task(cache_verified_members(guild))
+
+@bot.event
+async def on_guild_remove(guild):
+    guild_cache.clear(guild.id)
+    if member_cache:
+        member_cache.clear(guild.id)
+
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    if member_cache and isinstance(interaction.user, discord.Member):
+        member_cache.touch(interaction.user)
 
 @bot.event
 async def on_connect():
-    print("Bot connected to Discord!")
+    log_event("connected")
 
 @bot.event
 async def on_disconnect():
-    print("Bot disconnected from Discord!")
+    log_event("disconnected", logging.WARNING)
 
 @bot.event
 async def on_error(event, *args, **kwargs):
-    logging.error(f'Error in {event}:', exc_info=True)
+    log_event("event_handler_failed", logging.ERROR, exc_info=True, handler=event)
 
 @bot.event
 async def on_message(message):
-    print(f"Message received: {message.content}")  # Debug print
+    # Metadata only, never message content. Sampled and rate limited by default.
+    log_event(
+        "message_received",
+        logging.DEBUG,
+        channel_id=message.channel.id,
+        author_id=message.author.id,
+        length=len(message.content)
+    )
     if message.author == bot.user:
         return
     
@@ -189,47 +753,129 @@ async def setup_verification(ctx):
     try:
         view = VerifyView()
         await ctx.send(embed=embed, view=view)
-    except Exception as e:
-        print(f"Setup error: {e}")
+    except Exception:
+        log_event("setup_failed", logging.ERROR, exc_info=True, command="setup_verification")
         await ctx.send("Error setting up verification. Please try again.")
         
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    if member_cache and isinstance(ctx.author, discord.Member):
+        member_cache.touch(ctx.author)
+
+@bot.after_invoke
+async def record_command_time(ctx):
+    outcome = "error" if ctx.command_failed else "success"
+    metrics.observe("command_seconds", time.perf_counter() - ctx.started_at, command=ctx.command.name)
+    metrics.inc("command_outcomes_total", command=ctx.command.name, outcome=outcome)
+
 @bot.event
 async def on_command_error(ctx, error):
-    print(f"Error occurred: {str(error)}")  # Debug print
+    log_event("command_error", logging.WARNING, command=ctx.command.name if ctx.command else None, error=str(error))
     try:
         if isinstance(error, commands.MissingRequiredArgument):
             error_msg = await ctx.send("Missing required arguments! Usage: !verify ID_NUMBER")
             await asyncio.sleep(10)
-            await error_msg.delete()
+            await api.submit("delete_message", error_msg.delete, PRIORITY_COSMETIC)
         
         # Try to delete the command message that caused the error
         try:
-            await ctx.message.delete()
+            await api.submit("delete_message", ctx.message.delete, PRIORITY_COSMETIC)
         except Exception as e:
-            print(f"Could not delete command message: {e}")
-    except Exception as e:
-        print(f"Error in error handling: {e}")
+            log_event("command_message_delete_failed", logging.WARNING, error=str(e))
+    except Exception:
+        log_event("command_error_handling_failed", logging.ERROR, exc_info=True)
+
+def is_section_role(role, part):
+    return role.name.startswith("Section-") or part.roster.is_roster_role(role.name)
+
+async def restore_verification_access(batch):
+    """Handles a burst of role removals with at most one API call per member"""
+    calls = []
+    for member in batch.values():
+        # The cached member has been kept up to date, so this sees its final roles
+        if any(role.name.startswith("Section-") for role in member.roles):
+            continue
+        if VERIFICATION_GATING == 'role':
+            verified_role = discord.utils.get(member.roles, name=VERIFIED_ROLE_NAME)
+            if verified_role:
+                calls.append(api.submit(
+                    "remove_roles",
+                    lambda member=member, role=verified_role: member.remove_roles(role),
+                    PRIORITY_MAINTENANCE
+                ))
+        else:
+            verification_channel = guild_cache.channel(member.guild, VERIFICATION_CHANNEL_NAME)
+            if verification_channel is None:
+                continue
+            overwrite = verification_channel.overwrites_for(member)
+            if overwrite.read_messages and overwrite.send_messages:
+                continue
+            calls.append(api.submit(
+                "set_permissions",
+                lambda member=member, channel=verification_channel: channel.set_permissions(
+                    member,
+                    read_messages=True,
+                    send_messages=True
+                ),
+                PRIORITY_MAINTENANCE
+            ))
+
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    metrics.inc("member_update_actions_total", len(results) - failed, outcome="success")
+    metrics.inc("member_update_actions_total", failed, outcome="error")
+    if failed:
+        log_event("verification_access_restore_failed", logging.WARNING, members=len(results), failed=failed)
+
+# Section role removals are handled MEMBER_UPDATE_COALESCE_SECONDS after the first one,
+# once per member, so an end-of-term cleanup doesn't become one API call per event
+MEMBER_UPDATE_COALESCE_SECONDS = float(os.getenv('MEMBER_UPDATE_COALESCE_SECONDS', '2'))
+member_updates = UpdateCoalescer(MEMBER_UPDATE_COALESCE_SECONDS, restore_verification_access)
 
 @bot.event
 async def on_member_update(before, after):
-    # Check if roles were removed
+    # Nickname, avatar and timeout changes, and changes to other roles, need nothing
     removed_roles = set(before.roles) - set(after.roles)
-    
-    if removed_roles:
-        has_section = False
-        for role in after.roles:
-            if role.name.startswith("Section-"):
-                has_section = True
-                break
-        
-        # If user has no section roles, show verification channel
-        if not has_section:
-            verification_channel = discord.utils.get(after.guild.channels, name="verification")
-            if verification_channel:
-                await verification_channel.set_permissions(after,
-                    read_messages=True,
-                    send_messages=True
-                )
+    part = guild_partitions.peek(after.guild.id)
+    if part is None and removed_roles and (
+        any(role.name.startswith("Section-") for role in removed_roles)
+        or await guild_partitions.may_hold_claim(after.guild.id, after.id)
+    ):
+        # An idle guild is loaded for section role removals and for verified members, whose
+        # removed role may be a roster role. Everything else can be ignored without its data.
+        part = await guild_partitions.get(after.guild.id)
+    if part is None or not any(is_section_role(role, part) for role in removed_roles):
+        metrics.inc("member_updates_total", outcome="ignored")
+        return
+
+    # Free the member's ID if the role it granted was taken away
+    claimed_id = await claims_call(part.claims.student_for, after.id)
+    mapping = part.roster.lookup(claimed_id) if claimed_id else None
+    if mapping and any(role.name == mapping["role"] for role in removed_roles):
+        await claims_call(part.claims.release, claimed_id, after.id)
+        save_claims_later(part.claims)
+        if member_cache:
+            member_cache.unpin(after)
+
+    metrics.inc("member_updates_total", outcome="queued")
+    member_updates.add((after.guild.id, after.id), after)
+
+@bot.event
+async def on_raw_member_remove(payload):
+    # Members who leave give their ID back. The raw event also fires for uncached members.
+    if member_cache:
+        guild = bot.get_guild(payload.guild_id)
+        if guild:
+            member_cache.forget(guild, payload.user.id)
+    # An idle guild's data isn't loaded just to free one claim
+    if await guild_partitions.release_stored_claim(payload.guild_id, payload.user.id):
+        return
+    part = await guild_partitions.get(payload.guild_id)
+    claimed_id = await claims_call(part.claims.student_for, payload.user.id)
+    if claimed_id:
+        await claims_call(part.claims.release, claimed_id, payload.user.id)
+        save_claims_later(part.claims)
 
 # Add this class for the Marks button
 class MarksView(discord.ui.View):
@@ -241,11 +887,27 @@ class MarksView(discord.ui.View):
         try:
             modal = MarksModal()
             await interaction.response.send_modal(modal)
-        except Exception as e:
-            print(f"Marks button error: {e}")
+        except Exception:
+            log_event("marks_button_failed", logging.ERROR, exc_info=True, user_id=interaction.user.id)
             await interaction.response.send_message("An error occurred. Please try again.", ephemeral=True)
 
+@bot.event
+async def setup_hook():
+    # Both views have timeout=None and fixed custom_ids, so buttons posted before a restart keep working
+    bot.add_view(VerifyView())
+    bot.add_view(MarksView())
+
 # Add this class for the Marks modal
+def format_assessment(result):
+    """One assessment's mark with its precomputed rank and section aggregates"""
+    if "rank" not in result:
+        return result["marks"]
+    return (
+        f"**{result['marks']}**, rank {result['rank']} of {result['of']} in your section "
+        f"({result['percentile']:.0f}th percentile)\n"
+        f"Section mean {result['mean']:.1f}, median {result['median']:.1f}"
+    )
+
 class MarksModal(discord.ui.Modal):
     def __init__(self):
         super().__init__(title="Check Marks")
@@ -257,40 +919,38 @@ class MarksModal(discord.ui.Modal):
             max_length=10
         )
         self.add_item(self.student_id)
+        self.completion = None
 
     async def on_submit(self, interaction: discord.Interaction):
+        if await acknowledge(interaction, "marks"):
+            self.completion = start_interaction_task(self.complete(interaction))
+
+    async def complete(self, interaction):
+        with metrics.timer("marks_seconds"):
+            outcome = await self.show_marks(interaction)
+        metrics.inc("marks_outcomes_total", outcome=outcome)
+
+    async def show_marks(self, interaction):
+        """Looks up and sends the student's marks, returns the outcome for the metrics"""
         try:
             entered_id = str(self.student_id.value).strip()
             member = interaction.user
             
             # Check if the user has been verified and get their verified ID
-            verified_id = None
-            for role in member.roles:
-                if role.name in [mapping["role"] for mapping in ID_MAPPING.values()]:
-                    # Find the ID that matches this role
-                    for id_num, data in ID_MAPPING.items():
-                        if data["role"] == role.name:
-                            verified_id = id_num
-                            break
-                    break
+            part = await guild_partitions.get(interaction.guild.id)
+            verified_id = await resolve_verified_id(member, part)
             
             # If user is not verified or trying to access different ID
             if not verified_id:
-                await interaction.response.send_message(
-                    "You need to verify yourself first using the verification system!",
-                    ephemeral=True
-                )
-                return
+                await reply(interaction, "You need to verify yourself first using the verification system!")
+                return "not_verified"
             
             if verified_id != entered_id:
-                await interaction.response.send_message(
-                    "You can only check marks for your own verified ID!",
-                    ephemeral=True
-                )
-                return
+                await reply(interaction, "You can only check marks for your own verified ID!")
+                return "wrong_id"
             
             # Get student information from Excel file
-            student_info = self.get_marks(entered_id)
+            student_info = self.get_marks(part, entered_id)
             
             if student_info:
                 # Create an embed for the student information
@@ -304,58 +964,25 @@ class MarksModal(discord.ui.Modal):
                 embed.add_field(name="ID", value=student_info["ID"], inline=True)
                 embed.add_field(name="G-suit", value=student_info["G-suit"], inline=True)
                 embed.add_field(name="Section", value=student_info["Section"], inline=True)
-                embed.add_field(name="Marks", value=student_info["Marks"], inline=False)
+                for result in student_info["Assessments"][:21]:
+                    embed.add_field(name=result["name"], value=format_assessment(result), inline=False)
                 
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+                await reply(interaction, embed=embed)
+                return "success"
             else:
-                await interaction.response.send_message(
-                    "No information found for this ID. Please check your ID and try again.",
-                    ephemeral=True
-                )
+                await reply(interaction, "No information found for this ID. Please check your ID and try again.")
+                return "not_found"
 
-        except Exception as e:
-            print(f"Marks fetch error: {e}")
-            await interaction.response.send_message(
-                "An error occurred while fetching information. Please try again later.",
-                ephemeral=True
-            )
+        except Exception:
+            log_event("marks_fetch_failed", logging.ERROR, exc_info=True, user_id=interaction.user.id)
+            await reply(interaction, "An error occurred while fetching information. Please try again later.")
+            return "error"
 
-    def get_marks(self, student_id):
-        try:
-            print(f"Current working directory: {os.getcwd()}")
-            print(f"Looking for file: markst.xlsx")
-            
-            # Load the Excel file
-            wb = openpyxl.load_workbook('markst.xlsx')
-            sheet = wb.active
-            
-            # Convert student_id to string and remove any whitespace
-            student_id = str(student_id).strip()
-            print(f"Searching for Student ID: {student_id}")
-            
-            # Find the student's information
-            for row in sheet.iter_rows(min_row=2):  # Start from second row
-                cell_value = str(row[0].value).strip() if row[0].value is not None else ""
-                if cell_value == student_id:
-                    # Found the student, get all their information
-                    student_info = {
-                        "Name": str(row[1].value) if row[1].value is not None else "N/A",
-                        "ID": str(row[0].value) if row[0].value is not None else "N/A",
-                        "G-suit": str(row[2].value) if row[2].value is not None else "N/A",
-                        "Section": str(row[3].value) if row[3].value is not None else "N/A",
-                        "Marks": str(row[4].value) if row[4].value is not None else "N/A"
-                    }
-                    print(f"Found student info: {student_info}")
-                    return student_info
-
-            print(f"No information found for ID: {student_id}")
-            return None
-
-        except Exception as e:
-            print(f"Excel read error: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+    def get_marks(self, part, student_id):
+        with metrics.timer("marks_lookup_seconds"):
+            student_info = part.marks_store.get(student_id)
+        log_event("marks_lookup", logging.DEBUG, found=student_info is not None)
+        return student_info
 
 # Add this new command for setting up the marks checker
 @bot.command()
@@ -377,169 +1004,702 @@ async def setup_marks(ctx):
     try:
         view = MarksView()
         await ctx.send(embed=embed, view=view)
-    except Exception as e:
-        print(f"Setup error: {e}")
+    except Exception:
+        log_event("setup_failed", logging.ERROR, exc_info=True, command="setup_marks")
         await ctx.send("Error setting up marks checker. Please try again.")
 
 @bot.command()
 @commands.has_permissions(administrator=True)
-async def check_verifications(ctx):
-    """Shows which users are verified with which IDs"""
+async def check_verifications(ctx, output: str = None):
+    """Shows which users are verified with which IDs. Use 'csv' to get the full list as a file."""
     try:
         guild = ctx.guild
+        entries = await sorted_verifications(guild, await guild_partitions.get(guild.id))
+
+        if output == "csv":
+            export_path = os.path.join(tempfile.gettempdir(), f"{ctx.message.id}_verifications.csv")
+            try:
+                members = await find_members(guild, [member_id for _, _, member_id in entries])
+                names = {member_id: member.display_name for member_id, member in members.items()}
+                count = await workbooks.run(export_path, write_verifications_csv, export_path, names, entries)
+                await ctx.send(
+                    f"{count} verified users.",
+                    file=discord.File(export_path, filename="verifications.csv")
+                )
+            finally:
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+            return
+
+        view = VerificationPages(ctx.author.id, guild, entries)
+        await ctx.send(embed=await view.build_page(), view=view if view.page_count > 1 else None)
+
+    except Exception:
+        log_event("check_verifications_failed", logging.ERROR, exc_info=True)
+        await ctx.send("An error occurred while checking verifications.")
+
+async def sorted_verifications(guild, part):
+    """(role, Student ID, Discord ID) for every claimed ID on the roster held by a member of the guild, sorted by role"""
+    pairs = await claims_call(part.claims.items)
+    if part is default_partition:
+        # Every guild not in GUILD_CONFIG_FILE shares these claims, list only this guild's
+        members = await find_members(guild, [member_id for _, member_id in pairs])
+        pairs = [(student_id, member_id) for student_id, member_id in pairs if member_id in members]
+    entries = []
+    for student_id, member_id in pairs:
+        mapping = part.roster.lookup(student_id)
+        if mapping:
+            entries.append((mapping["role"], student_id, member_id))
+    entries.sort()
+    return entries
+
+async def find_members(guild, member_ids):
+    """{member ID: member} for the IDs still in the guild. In lean mode uncached members are fetched."""
+    if member_cache:
+        return await member_cache.get_many(guild, member_ids)
+    members = {}
+    for member_id in member_ids:
+        member = guild.get_member(member_id)
+        if member is not None:
+            members[member_id] = member
+    return members
+
+def write_verifications_csv(path, names, entries):
+    """Writes the verification list to a CSV file one row at a time, returns the row count"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Discord Name", "Discord ID", "Student ID", "Role"])
+        for role_name, student_id, member_id in entries:
+            writer.writerow([names.get(member_id, ""), member_id, student_id, role_name])
+            count += 1
+    return count
+
+class VerificationPages(discord.ui.View):
+    """Pages through the verification list, building each embed only when it is shown"""
+
+    PAGE_SIZE = 24
+
+    def __init__(self, author_id, guild, entries):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.guild = guild
+        self.entries = entries
+        self.page = 0
+        self.page_count = max(1, (len(entries) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def build_page(self):
         embed = discord.Embed(
             title="🔍 Verification Status",
-            description="List of verified users and their IDs",
+            description=f"{len(self.entries)} verified users",
             color=discord.Color.blue()
         )
 
-        # Create a mapping of role names to IDs for quick lookup
-        role_to_id = {data["role"]: id_num for id_num, data in ID_MAPPING.items()}
-        
-        verified_users = []
-        for member in guild.members:
-            for role in member.roles:
-                if role.name in role_to_id:
-                    verified_users.append({
-                        "member": member,
-                        "role": role.name,
-                        "id": role_to_id[role.name]
-                    })
-        
-        if verified_users:
-            # Sort by role name for better organization
-            verified_users.sort(key=lambda x: x["role"])
-            
-            # Add fields for each verified user
-            for user in verified_users:
-                embed.add_field(
-                    name=f"{user['member'].display_name}",
-                    value=f"ID: {user['id']}\nRole: {user['role']}",
-                    inline=True
-                )
-        else:
+        if not self.entries:
             embed.add_field(
                 name="No Verified Users",
                 value="No users have been verified yet.",
                 inline=False
             )
+            return embed
 
-        await ctx.send(embed=embed)
+        start = self.page * self.PAGE_SIZE
+        page = self.entries[start:start + self.PAGE_SIZE]
+        members = await find_members(self.guild, [member_id for _, _, member_id in page])
+        for role_name, student_id, member_id in page:
+            member = members.get(member_id)
+            embed.add_field(
+                name=member.display_name if member else str(member_id),
+                value=f"<@{member_id}>\nID: {student_id}\nRole: {role_name}",
+                inline=True
+            )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count}")
+        return embed
 
-    except Exception as e:
-        print(f"Check verifications error: {e}")
-        await ctx.send("An error occurred while checking verifications.")
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the admin who ran the command can change pages.", ephemeral=True)
+            return False
+        return True
 
-async def update_student_records(member, student_id, section):
+    @discord.ui.button(label="Previous", style=ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=await self.build_page(), view=self)
+
+    @discord.ui.button(label="Next", style=ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.page_count - 1, self.page + 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=await self.build_page(), view=self)
+
+async def update_student_records(member, student_id, section, part):
     try:
-        # Clean section name for filename (remove "Section-" prefix)
-        section_number = section.replace("Section-", "")
-        filename = f"students{section_number}.xlsx"
-        
-        # Check if file exists, if not create it with headers
-        if not os.path.exists(filename):
-            wb = openpyxl.Workbook()
-            sheet = wb.active
-            sheet.append(["Discord Username", "Discord ID", "Student ID", "Verification Date", "Status"])
-            wb.save(filename)
-        
-        # Load existing file
-        wb = openpyxl.load_workbook(filename)
-        sheet = wb.active
-        
-        # Check if student ID already exists
-        student_exists = False
-        for row in sheet.iter_rows(min_row=2):
-            if str(row[2].value) == student_id:  # Check Student ID column
-                student_exists = True
-                # Update existing record
-                row[0].value = member.name  # Discord Username
-                row[1].value = str(member.id)  # Discord ID
-                row[4].value = "Active"  # Status
-                break
-        
-        # If student doesn't exist, add new record
-        if not student_exists:
-            from datetime import datetime
-            sheet.append([
-                member.name,  # Discord Username
-                str(member.id),  # Discord ID
-                student_id,  # Student ID
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),  # Verification Date
-                "Active"  # Status
-            ])
-        
-        # Save changes
-        wb.save(filename)
-        print(f"Updated student records in {filename}")
+        verified_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if part.records_db:
+            await workbooks.run(
+                part.records_db.path,
+                part.records_db.upsert,
+                records.section_number(section),
+                member.name,
+                member.id,
+                student_id,
+                verified_at
+            )
+            part.section_counters.record_active(records.section_number(section), student_id)
+            return True
+
+        # Only the default partition can use the xlsx backend
+        filename = records.section_filename(section)
+        entry = journal.add(filename, member.name, member.id, student_id, verified_at)
+        await workbooks.run(journal.path, journal.append, entry)
+        part.section_counters.record_active(records.section_number(section), student_id)
         return True
         
-    except Exception as e:
-        print(f"Error updating student records: {e}")
+    except Exception:
+        log_event("records_update_failed", logging.ERROR, exc_info=True, user_id=member.id, section=section)
         return False
 
-@bot.command()
-@commands.has_permissions(administrator=True)
-async def section_stats(ctx, section_number: str = None):
-    """Shows statistics for a specific section or all sections"""
-    try:
-        if section_number:
-            filenames = [f"students{section_number}.xlsx"]
-        else:
-            # Get all students*.xlsx files
-            filenames = [f for f in os.listdir() if f.startswith("students") and f.endswith(".xlsx")]
-        
-        if not filenames:
-            await ctx.send("No section records found!")
-            return
-        
+class SectionStatsPages(discord.ui.View):
+    """Pages through the section statistics, 24 sections per embed"""
+
+    PAGE_SIZE = 24
+
+    def __init__(self, author_id, counts):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.sections = list(counts.items())
+        self.page = 0
+        self.page_count = max(1, (len(self.sections) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    def build_page(self):
         embed = discord.Embed(
             title="📊 Section Statistics",
             color=discord.Color.blue()
         )
-        
-        for filename in filenames:
-            if not os.path.exists(filename):
-                continue
-                
-            wb = openpyxl.load_workbook(filename)
-            sheet = wb.active
-            
-            # Count total and active students
-            total_students = 0
-            active_students = 0
-            for row in sheet.iter_rows(min_row=2):
-                if row[0].value:  # If there's a username
-                    total_students += 1
-                    if row[4].value == "Active":
-                        active_students += 1
-            
-            section_num = filename.replace("students", "").replace(".xlsx", "")
+        if len(self.sections) > 1:
+            embed.description = (
+                f"{len(self.sections)} sections, "
+                f"{sum(total for _, (total, _) in self.sections)} registered, "
+                f"{sum(active for _, (_, active) in self.sections)} active"
+            )
+
+        start = self.page * self.PAGE_SIZE
+        for section_num, (total_students, active_students) in self.sections[start:start + self.PAGE_SIZE]:
             embed.add_field(
                 name=f"Section {section_num}",
                 value=f"Total Registered: {total_students}\nActive: {active_students}",
                 inline=True
             )
+        if self.page_count > 1:
+            embed.set_footer(text=f"Page {self.page + 1}/{self.page_count}, or use !section_stats <n> for one section")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the admin who ran the command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_page(), view=self)
+
+    @discord.ui.button(label="Next", style=ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.page_count - 1, self.page + 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_page(), view=self)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def section_stats(ctx, section_number: str = None):
+    """Shows statistics for a specific section or all sections"""
+    try:
+        part = await guild_partitions.get(ctx.guild.id)
+        counts = part.section_counters.counts(section_number)
+        if not counts:
+            await ctx.send("No section records found!")
+            return
+
+        view = SectionStatsPages(ctx.author.id, counts)
+        await ctx.send(embed=view.build_page(), view=view if view.page_count > 1 else None)
         
-        await ctx.send(embed=embed)
-        
-    except Exception as e:
-        print(f"Error getting section stats: {e}")
+    except Exception:
+        log_event("section_stats_failed", logging.ERROR, exc_info=True)
         await ctx.send("An error occurred while getting section statistics.")
 
-# Load token and run bot
-load_dotenv()
-token = os.getenv('DISCORD_TOKEN')
-
-if not token:
-    print("ERROR: No token found in .env file!")
-    exit(1)
-
-try:
-    bot.run(token)
-except discord.LoginFailure:
-    print("ERROR: Invalid token or improper privileges!")
-except discord.PrivilegedIntentsRequired:
-    print("ERROR: Required privileged intents are not enabled!")
-except Exception as e:
-    print(f"ERROR: An unexpected error occurred: {str(e)}")
\ No newline at end of file
+def format_distribution(stats, with_histogram=False):
+    if not stats["count"]:
+        return "No marks"
+    text = (
+        f"{stats['count']} students\n"
+        f"Mean {stats['mean']:.1f}, median {stats['median']:.1f}, sd {stats['std']:.1f}\n"
+        f"Range {stats['min']:g} to {stats['max']:g}"
+    )
+    if with_histogram:
+        counts, edges = stats["histogram"]
+        peak = max(counts) or 1
+        bars = "\n".join(
+            f"{edges[n]:>6.1f} {'█' * round(count * 12 / peak):<12} {count}"
+            for n, count in enumerate(counts)
+        )
+        text += f"\n```{bars}```"
+    return text
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def marks_distribution(ctx, section: str = None, *, assessment: str = None):
+    """Shows every assessment's distribution for a section ('all' for everyone), or use 'sections [assessment]' to compare sections"""
+    part = await guild_partitions.get(ctx.guild.id)
+    table = part.marks_store.table
+    if not len(table):
+        await ctx.send(f"No marks loaded from {part.marks_store.path}.")
+        return
+
+    if section is None or section.lower() == "sections":
+        assessment = assessment or table.assessments[0]
+        if assessment not in table.assessments:
+            await ctx.send(f"Unknown assessment. Available: {', '.join(table.assessments)}")
+            return
+        embed = discord.Embed(title=f"📈 {assessment} by Section", color=discord.Color.blue())
+        for name in [marks_analytics.ALL_SECTIONS, *table.sections][:25]:
+            embed.add_field(name=f"Section {name}", value=format_distribution(table.distribution(name, assessment)), inline=True)
+        await ctx.send(embed=embed)
+        return
+
+    if section.lower() == "all":
+        section = marks_analytics.ALL_SECTIONS
+    if section not in table.stats:
+        await ctx.send(f"No marks for section {section}.")
+        return
+    embed = discord.Embed(title=f"📈 Marks Distribution, Section {section}", color=discord.Color.blue())
+    # Histograms are long, so fewer fields fit in one embed
+    for name in table.assessments[:10]:
+        embed.add_field(
+            name=name,
+            value=format_distribution(table.distribution(section, name), with_histogram=True)[:1024],
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def export_records(ctx, section_number: str = None):
+    """Sends the student records as an xlsx file"""
+    records_db = (await guild_partitions.get(ctx.guild.id)).records_db
+    if not records_db:
+        await ctx.send("Records are already kept as students*.xlsx files.")
+        return
+
+    filename = f"student_records_{section_number}.xlsx" if section_number else "student_records.xlsx"
+    export_path = os.path.join(tempfile.gettempdir(), f"{ctx.message.id}_{filename}")
+    try:
+        count = await workbooks.run(records_db.path, records_db.export_workbook, export_path, section_number)
+        await ctx.send(f"Exported {count} student records.", file=discord.File(export_path, filename=filename))
+    except Exception:
+        log_event("records_export_failed", logging.ERROR, exc_info=True, section=section_number)
+        await ctx.send("An error occurred while exporting student records.")
+    finally:
+        if os.path.exists(export_path):
+            os.remove(export_path)
+
+async def resolve_bulk_members(guild, valid):
+    """Finds the guild member for each assignment, fetching uncached ones 100 at a time"""
+    members = {}
+    missing_ids = []
+    for row_number, user, student_id, mapping in valid:
+        user_id = bulk_import.parse_user(user)
+        member = guild.get_member(user_id) if user_id else guild.get_member_named(user)
+        if member:
+            members[row_number] = member
+        elif user_id:
+            missing_ids.append(user_id)
+
+    if member_cache:
+        # Only the members that end up verified are cached, by pinning them
+        fetched = await member_cache.get_many(guild, missing_ids)
+    else:
+        fetched = {}
+        for i in range(0, len(missing_ids), 100):
+            for member in await guild.query_members(user_ids=missing_ids[i:i + 100], cache=True):
+                fetched[member.id] = member
+    for row_number, user, student_id, mapping in valid:
+        if row_number not in members:
+            user_id = bulk_import.parse_user(user)
+            if user_id in fetched:
+                members[row_number] = fetched[user_id]
+    return members
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def bulk_verify(ctx, mode: str = None):
+    """Verifies students from an attached CSV/xlsx of Discord user, Student ID. Use 'skip_invalid' to apply the valid rows only."""
+    if not ctx.message.attachments:
+        await ctx.send("Attach a CSV or xlsx file with two columns: Discord user (ID, mention or username) and Student ID.")
+        return
+
+    attachment = ctx.message.attachments[0]
+    try:
+        data = await attachment.read()
+        assignments = await asyncio.to_thread(bulk_import.parse_assignments, attachment.filename, data)
+    except Exception:
+        log_event("bulk_verify_read_failed", logging.ERROR, exc_info=True, file=attachment.filename)
+        await ctx.send("Could not read the attached file.")
+        return
+
+    # Validate the whole file before changing anything
+    guild = ctx.guild
+    part = await guild_partitions.get(guild.id)
+    claimed = part.claims
+    if claimed.blocking:
+        # Check the file against one in-memory copy instead of a query per row
+        claimed = ClaimRegistry(None)
+        claimed.rebuild(await claims_call(part.claims.items))
+    valid, errors = bulk_import.validate_assignments(assignments, part.roster, claimed)
+    members = await resolve_bulk_members(guild, valid)
+    to_apply = []
+    for row_number, user, student_id, mapping in valid:
+        member = members.get(row_number)
+        if member is None:
+            errors.append((row_number, f"{user} is not a member of this server"))
+            continue
+        claimed_id = claimed.student_for(member.id)
+        if claimed_id and claimed_id != student_id:
+            errors.append((row_number, f"{user} is already verified as {claimed_id}"))
+            continue
+        owner = claimed.owner_of(student_id)
+        if owner is not None and owner != member.id:
+            errors.append((row_number, f"Student ID {student_id} is already claimed by another user"))
+            continue
+        to_apply.append((row_number, member, student_id, mapping))
+    errors.sort()
+
+    if errors and mode != "skip_invalid":
+        lines = [f"Row {row_number}: {reason}" for row_number, reason in errors[:15]]
+        if len(errors) > 15:
+            lines.append(f"...and {len(errors) - 15} more")
+        await ctx.send(
+            f"Found {len(errors)} invalid rows, nothing was changed:\n" + "\n".join(lines) +
+            "\nFix the file, or run `!bulk_verify skip_invalid` to apply the valid rows only."
+        )
+        return
+
+    if not to_apply:
+        await ctx.send("No valid rows to apply.")
+        return
+
+    status_message = await ctx.send(f"Verifying {len(to_apply)} students...")
+    throttle = bulk_import.Throttle(BULK_REQUESTS_PER_SECOND)
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+    results = {"granted": 0, "unchanged": 0, "failed": []}
+
+    # Resolve each role and channel once, before the members are processed
+    roles = {}
+    for row_number, member, student_id, mapping in to_apply:
+        if mapping["role"] in roles:
+            continue
+        await throttle.wait()
+        role = await get_or_create_role(guild, mapping["role"], PRIORITY_BULK)
+        if mapping["channel"]:
+            await throttle.wait()
+            await ensure_section_channel(guild, mapping["channel"], role, PRIORITY_BULK)
+        roles[mapping["role"]] = role
+
+    extra_roles = []
+    verification_channel = guild_cache.channel(guild, VERIFICATION_CHANNEL_NAME)
+    if VERIFICATION_GATING == 'role' and verification_channel:
+        extra_roles.append(await ensure_verification_gate(guild, verification_channel, PRIORITY_BULK))
+
+    async def apply(row_number, member, student_id, mapping):
+        async with semaphore:
+            if not await claims_call(part.claims.claim, student_id, member.id):
+                results["failed"].append((row_number, f"Student ID {student_id} was claimed meanwhile"))
+                return
+            role = roles[mapping["role"]]
+            try:
+                missing = [r for r in [role, *extra_roles] if r not in member.roles]
+                if not missing:
+                    results["unchanged"] += 1
+                else:
+                    await throttle.wait()
+                    await api.submit(
+                        "add_roles",
+                        lambda: member.add_roles(*missing, reason="Bulk verification"),
+                        PRIORITY_BULK
+                    )
+                    results["granted"] += 1
+            except discord.HTTPException as e:
+                await claims_call(part.claims.release, student_id, member.id)
+                results["failed"].append((row_number, f"could not add role: {e}"))
+                return
+            if member_cache:
+                member_cache.pin(member)
+            await update_student_records(member, student_id, mapping["role"], part)
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(5)
+            done = results["granted"] + results["unchanged"] + len(results["failed"])
+            try:
+                await status_message.edit(content=f"Verifying students... {done}/{len(to_apply)}")
+            except discord.HTTPException:
+                pass
+
+    progress = asyncio.create_task(report_progress())
+    try:
+        await asyncio.gather(*(apply(*assignment) for assignment in to_apply))
+    finally:
+        progress.cancel()
+        save_claims_later(part.claims)
+
+    embed = discord.Embed(
+        title="📥 Bulk Verification",
+        description=f"Processed {len(to_apply)} students",
+        color=discord.Color.green() if not results["failed"] else discord.Color.orange()
+    )
+    embed.add_field(name="Roles granted", value=str(results["granted"]), inline=True)
+    embed.add_field(name="Already had role", value=str(results["unchanged"]), inline=True)
+    embed.add_field(name="Failed", value=str(len(results["failed"])), inline=True)
+    if errors:
+        embed.add_field(name="Skipped invalid rows", value=str(len(errors)), inline=True)
+    if results["failed"]:
+        failures = "\n".join(f"Row {row_number}: {reason}" for row_number, reason in sorted(results["failed"])[:10])
+        embed.add_field(name="Failures", value=failures[:1024], inline=False)
+    await status_message.edit(content=None, embed=embed)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def migrate_verification_gating(ctx):
+    """Replaces per-member overwrites on #verification with one Verified role overwrite"""
+    if VERIFICATION_GATING != 'role':
+        await ctx.send("Set VERIFICATION_GATING=role and restart the bot before migrating.")
+        return
+
+    guild = ctx.guild
+    channel = guild_cache.channel(guild, VERIFICATION_CHANNEL_NAME)
+    if not channel:
+        await ctx.send(f"No #{VERIFICATION_CHANNEL_NAME} channel found.")
+        return
+
+    verified_role = await ensure_verification_gate(guild, channel, PRIORITY_BULK)
+    member_overwrites = [
+        (target, overwrite) for target, overwrite in channel.overwrites.items()
+        if not isinstance(target, discord.Role)
+    ]
+    if not member_overwrites:
+        await ctx.send("There are no member overwrites to migrate.")
+        return
+
+    status_message = await ctx.send(f"Migrating {len(member_overwrites)} member overwrites...")
+    throttle = bulk_import.Throttle(BULK_REQUESTS_PER_SECOND)
+    results = {"granted": 0, "removed": 0, "departed": 0, "failed": 0}
+
+    async def migrate(target, overwrite):
+        # Uses raw IDs so members missing from the cache don't need to be fetched
+        try:
+            if overwrite.read_messages is False:
+                # The overwrite hid the channel, so this member was verified
+                member = guild.get_member(target.id)
+                if member is None or verified_role not in member.roles:
+                    await throttle.wait()
+                    try:
+                        await api.submit("add_roles", lambda: bot.http.add_role(
+                            guild.id, target.id, verified_role.id, reason="Verification gating migration"
+                        ), PRIORITY_BULK)
+                        results["granted"] += 1
+                    except discord.NotFound:
+                        # The member left, their overwrite still has to go
+                        results["departed"] += 1
+            await throttle.wait()
+            await api.submit("set_permissions", lambda: bot.http.delete_channel_permissions(
+                channel.id, target.id, reason="Verification gating migration"
+            ), PRIORITY_BULK)
+            results["removed"] += 1
+        except discord.HTTPException as e:
+            log_event("overwrite_migration_failed", logging.WARNING, target_id=target.id, error=str(e))
+            results["failed"] += 1
+
+    for start in range(0, len(member_overwrites), MIGRATION_BATCH_SIZE):
+        batch = member_overwrites[start:start + MIGRATION_BATCH_SIZE]
+        await asyncio.gather(*(migrate(target, overwrite) for target, overwrite in batch))
+        try:
+            await status_message.edit(
+                content=f"Migrating member overwrites... {start + len(batch)}/{len(member_overwrites)}"
+            )
+        except discord.HTTPException:
+            pass
+
+    await status_message.edit(content=(
+        f"Migration finished: removed {results['removed']} member overwrites, "
+        f"gave {VERIFIED_ROLE_NAME} to {results['granted']} members "
+        f"({results['departed']} had left the server), {results['failed']} failed."
+    ))
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def reload_roster_file(ctx):
+    """Reloads the student roster file now"""
+    if guild_partitions.configured(ctx.guild.id):
+        part = await guild_partitions.get(ctx.guild.id)
+        if not part.roster_file:
+            await ctx.send(f"This server has no roster file configured, using the built-in ID_MAPPING ({roster_summary(part.roster)}).")
+            return
+        try:
+            await workbooks.run(part.roster_file, part.roster.load_file, part.roster_file)
+            await ctx.send(f"Reloaded {part.roster_file}: {roster_summary(part.roster)}")
+        except Exception:
+            log_event("roster_reload_failed", logging.ERROR, exc_info=True, file=part.roster_file)
+            await ctx.send(f"Could not reload {part.roster_file}, still using the previous roster.")
+        return
+
+    if not ROSTER_FILE:
+        await ctx.send(f"No ROSTER_FILE is configured, using the built-in ID_MAPPING ({roster_summary()}).")
+        return
+    try:
+        await reload_roster(force=True)
+        await ctx.send(f"Reloaded {ROSTER_FILE}: {roster_summary()}")
+    except Exception:
+        log_event("roster_reload_failed", logging.ERROR, exc_info=True, file=ROSTER_FILE)
+        await ctx.send(f"Could not reload {ROSTER_FILE}, still using the previous roster.")
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def bot_metrics(ctx):
+    """Shows latency percentiles and outcome counts for the bot's hot paths"""
+    if not metrics.enabled:
+        await ctx.send("Metrics are disabled (METRICS_ENABLED=0).")
+        return
+
+    embed = discord.Embed(title="📈 Bot Metrics", color=discord.Color.blue())
+    for (name, labels), histogram in metrics.histograms()[:20]:
+        label_text = ", ".join(f"{value}" for key, value in labels)
+        embed.add_field(
+            name=f"{name}" + (f" ({label_text})" if label_text else ""),
+            value=(
+                f"{histogram.count} calls\n"
+                f"p50 {histogram.quantile(0.5) * 1000:.1f} ms\n"
+                f"p99 {histogram.quantile(0.99) * 1000:.1f} ms"
+            ),
+            inline=True
+        )
+
+    counters = [
+        f"{name} {', '.join(f'{key}={value}' for key, value in labels)}: {count}"
+        for (name, labels), count in metrics.counters()
+    ]
+    if counters:
+        embed.add_field(name="Counters", value="\n".join(counters)[:1024], inline=False)
+    embed.add_field(
+        name="Member updates",
+        value=f"{member_updates.received} received | {member_updates.flushed} handled | {len(member_updates)} pending",
+        inline=False
+    )
+    if member_cache:
+        embed.add_field(
+            name="Member cache",
+            value=f"{len(member_cache)} cached | {member_cache.hits} hits | {member_cache.fetches} fetched",
+            inline=False
+        )
+    if not embed.fields:
+        embed.description = "Nothing recorded yet."
+    await ctx.send(embed=embed)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def api_stats(ctx):
+    """Shows Discord API queue depth, wait times and rate limit counts"""
+    embed = discord.Embed(
+        title="📡 Discord API Scheduler",
+        description=(
+            f"Queued: {api.queue_depth()}\n"
+            f"Submitted: {api.submitted} | Completed: {api.completed} | Failed: {api.failed}\n"
+            f"Retries: {api.retries} | 429s raised: {sum(api.rate_limited.values())} | "
+            f"429s handled by discord.py: {api.library_rate_limits.count}"
+        ),
+        color=discord.Color.blue()
+    )
+    for priority, name in PRIORITY_NAMES.items():
+        waits = api.waits[priority]
+        embed.add_field(
+            name=f"{name.title()} wait",
+            value=f"{waits.count} calls\navg {waits.average * 1000:.0f} ms\nmax {waits.max * 1000:.0f} ms",
+            inline=True
+        )
+    if api.rate_limited:
+        embed.add_field(
+            name="429s by route",
+            value="\n".join(f"{route}: {count}" for route, count in sorted(api.rate_limited.items())),
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def io_status(ctx):
+    """Shows how many workbook jobs are queued or running"""
+    pending = workbooks.pending_by_file()
+    embed = discord.Embed(
+        title="🗂️ Workbook Queue",
+        description=f"Jobs in flight: {workbooks.queue_depth()} (pool size {workbooks.max_workers})",
+        color=discord.Color.blue()
+    )
+    for path, count in sorted(pending.items())[:24]:
+        embed.add_field(name=os.path.basename(path), value=f"{count} pending", inline=True)
+    if guild_partitions.configured_count():
+        embed.add_field(
+            name="Guild partitions",
+            value=(
+                f"{len(guild_partitions)} of {guild_partitions.configured_count()} loaded, "
+                f"{guild_partitions.loads} loads, {guild_partitions.evictions} evictions"
+            ),
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
+def main():
+    log_listener = setup_logging(
+        level=LOG_LEVEL,
+        as_json=LOG_FORMAT == 'json',
+        sampling=LOG_SAMPLING,
+        rate_limits=LOG_RATE_LIMITS
+    )
+
+    # Load token and run bot
+    token = os.getenv('DISCORD_TOKEN')
+
+    try:
+        if not token:
+            log_event("startup_failed", logging.CRITICAL, reason="No token found in .env file")
+            exit(1)
+
+        try:
+            bot.run(token, log_handler=None)
+        except discord.LoginFailure:
+            log_event("startup_failed", logging.CRITICAL, reason="Invalid token or improper privileges")
+        except discord.PrivilegedIntentsRequired:
+            log_event("startup_failed", logging.CRITICAL, reason="Required privileged intents are not enabled")
+        except Exception:
+            log_event("startup_failed", logging.CRITICAL, exc_info=True, reason="Unexpected error")
+    finally:
+        # Background saves still in flight when the loop closed
+        for part in [default_partition, *guild_partitions.loaded().values()]:
+            if part.claims.dirty:
+                part.claims.save()
+        log_listener.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import asyncio
+import csv
+import io
+import re
+import time
+
+import openpyxl
+
+MENTION_RE = re.compile(r"^<@!?([0-9]+)>$")
+USER_HEADERS = {"discord user", "discord", "discord id", "discord name", "discord username", "user", "username", "member"}
+ID_HEADERS = {"student id", "student", "id", "studentid", "student_id"}
+
+
+def parse_assignments(filename, data):
+    """Reads (row number, Discord user, Student ID) from a CSV or xlsx upload.
+
+    The first two columns are used. The first row is skipped as a header if one of its cells
+    is a known column name like "Discord User" or "Student ID", so non-numeric IDs still count.
+    """
+    if filename.lower().endswith(".xlsx"):
+        wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            rows = [tuple(row) for row in wb.active.iter_rows(max_col=2, values_only=True)]
+        finally:
+            wb.close()
+    else:
+        text = data.decode("utf-8-sig")
+        rows = [tuple(row) for row in csv.reader(io.StringIO(text))]
+
+    assignments = []
+    for row_number, row in enumerate(rows, start=1):
+        row = tuple(row) + (None,) * (2 - len(row))
+        user = str(row[0]).strip() if row[0] is not None else ""
+        student_id = str(row[1]).strip() if row[1] is not None else ""
+        if not user and not student_id:
+            continue
+        if row_number == 1 and (user.lower() in USER_HEADERS or student_id.lower() in ID_HEADERS):
+            continue
+        assignments.append((row_number, user, student_id))
+    return assignments
+
+
+def parse_user(value):
+    """Returns a Discord user ID from a raw ID or a mention, or None for a username"""
+    match = MENTION_RE.match(value)
+    if match:
+        return int(match.group(1))
+    if value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+def validate_assignments(assignments, roster, claims):
+    """Splits assignments into valid ones and (row number, reason) errors, checking the whole file"""
+    valid = []
+    errors = []
+    seen_ids = {}
+    seen_users = {}
+    for row_number, user, student_id in assignments:
+        if not user:
+            errors.append((row_number, "missing Discord user"))
+            continue
+        mapping = roster.lookup(student_id)
+        if not mapping:
+            errors.append((row_number, f"unknown Student ID {student_id}"))
+            continue
+        if student_id in seen_ids:
+            errors.append((row_number, f"Student ID {student_id} repeats row {seen_ids[student_id]}"))
+            continue
+        if user in seen_users:
+            errors.append((row_number, f"{user} repeats row {seen_users[user]}"))
+            continue
+
+        user_id = parse_user(user)
+        owner = claims.owner_of(student_id)
+        if owner is not None and user_id is not None and owner != user_id:
+            errors.append((row_number, f"Student ID {student_id} is already claimed by another user"))
+            continue
+
+        seen_ids[student_id] = row_number
+        seen_users[user] = row_number
+        valid.append((row_number, user, student_id, mapping))
+    return valid, errors
+
+
+class Throttle:
+    """Spaces out calls to at most `rate` per second across all callers."""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self._interval
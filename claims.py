@@ -0,0 +1,233 @@
+import json
+import os
+import sqlite3
+import threading
+
+
+class ClaimRegistry:
+    """Student ID <-> Discord user ID claims, persisted to a local JSON file."""
+
+    # Everything but load() and save() is in memory and safe to call on the event loop
+    blocking = False
+
+    def __init__(self, path="claimed_ids.json"):
+        self.path = path
+        self._by_student = {}
+        self._by_member = {}
+        self._save_lock = threading.Lock()
+        # Set by every change, cleared when save() takes its snapshot
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._by_student)
+
+    def owner_of(self, student_id):
+        return self._by_student.get(str(student_id).strip())
+
+    def student_for(self, member_id):
+        return self._by_member.get(member_id)
+
+    def items(self):
+        """(student ID, Discord user ID) pairs"""
+        return list(self._by_student.items())
+
+    def claim(self, student_id, member_id):
+        """Claims an ID for a member. Returns False if another member already holds it.
+
+        Never awaits, so the check and the update can't interleave with another submission.
+        """
+        student_id = str(student_id).strip()
+        owner = self._by_student.get(student_id)
+        if owner is not None and owner != member_id:
+            return False
+
+        previous = self._by_member.get(member_id)
+        if previous is not None and previous != student_id:
+            self._by_student.pop(previous, None)
+        self._by_student[student_id] = member_id
+        self._by_member[member_id] = student_id
+        self.dirty = True
+        return True
+
+    def release(self, student_id, member_id=None):
+        """Frees an ID, optionally only if it is held by the given member"""
+        student_id = str(student_id).strip()
+        owner = self._by_student.get(student_id)
+        if owner is None or (member_id is not None and owner != member_id):
+            return False
+        del self._by_student[student_id]
+        if self._by_member.get(owner) == student_id:
+            del self._by_member[owner]
+        self.dirty = True
+        return True
+
+    def rebuild(self, pairs):
+        """Replaces all claims in one pass from (student ID, Discord user ID) pairs"""
+        by_student = {}
+        by_member = {}
+        for student_id, member_id in pairs:
+            student_id = str(student_id).strip()
+            member_id = int(member_id)
+            if student_id in by_student or member_id in by_member:
+                # First claim wins, later duplicates are ignored
+                continue
+            by_student[student_id] = member_id
+            by_member[member_id] = student_id
+        self._by_student, self._by_member = by_student, by_member
+        self.dirty = True
+
+    def seeded(self):
+        """Whether claims have been saved before. Until then they are seeded from the student records."""
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Claims stored on disk, as (student ID, Discord user ID) pairs"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [(student_id, int(member_id)) for student_id, member_id in json.load(f).items()]
+
+    def save(self):
+        # Write to a temp file and rename so a crash never leaves a truncated file
+        with self._save_lock:
+            # Cleared before the copy, so a change made meanwhile marks it dirty again
+            self.dirty = False
+            snapshot = dict(self._by_student)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({student_id: str(member_id) for student_id, member_id in snapshot.items()}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+CLAIMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    student_id TEXT PRIMARY KEY,
+    member_id INTEGER NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS claims_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteClaimRegistry:
+    """The same claims kept in SQLite, so several bot processes can share them.
+
+    Every call goes to the database, which is what makes a claim in one process visible to
+    the others. Claims are committed as they are made. Calls can wait on another process's
+    write lock, so they belong off the event loop.
+    """
+
+    blocking = True
+    # Claims are committed as they are made, there is never anything left to save
+    dirty = False
+
+    def __init__(self, path="claims.db", legacy_path="claimed_ids.json"):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(CLAIMS_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def owner_of(self, student_id):
+        row = self._connect().execute(
+            "SELECT member_id FROM claims WHERE student_id = ?", (str(student_id).strip(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def student_for(self, member_id):
+        row = self._connect().execute("SELECT student_id FROM claims WHERE member_id = ?", (member_id,)).fetchone()
+        return row[0] if row else None
+
+    def items(self):
+        """(student ID, Discord user ID) pairs"""
+        return self._connect().execute("SELECT student_id, member_id FROM claims").fetchall()
+
+    def claim(self, student_id, member_id):
+        """Claims an ID for a member. Returns False if another member already holds it.
+
+        BEGIN IMMEDIATE takes the write lock before the check, so two processes can't both win.
+        """
+        student_id = str(student_id).strip()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT member_id FROM claims WHERE student_id = ?", (student_id,)).fetchone()
+            if row is not None and row[0] != member_id:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("DELETE FROM claims WHERE member_id = ?", (member_id,))
+            conn.execute("INSERT OR REPLACE INTO claims (student_id, member_id) VALUES (?, ?)", (student_id, member_id))
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, student_id, member_id=None):
+        """Frees an ID, optionally only if it is held by the given member"""
+        student_id = str(student_id).strip()
+        if member_id is None:
+            cursor = self._connect().execute("DELETE FROM claims WHERE student_id = ?", (student_id,))
+        else:
+            cursor = self._connect().execute(
+                "DELETE FROM claims WHERE student_id = ? AND member_id = ?", (student_id, member_id)
+            )
+        return cursor.rowcount > 0
+
+    def rebuild(self, pairs):
+        """Adds claims from (student ID, Discord user ID) pairs, first claim wins.
+
+        Unlike ClaimRegistry.rebuild nothing is removed, other processes may be claiming meanwhile.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO claims (student_id, member_id) VALUES (?, ?)",
+                ((str(student_id).strip(), int(member_id)) for student_id, member_id in pairs)
+            )
+            conn.execute("INSERT OR IGNORE INTO claims_meta (key, value) VALUES ('seeded', '1')")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def seeded(self):
+        """Whether claims were stored before, here or in claimed_ids.json. Until then they are
+        seeded from the student records."""
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            return True
+        row = self._connect().execute("SELECT 1 FROM claims_meta WHERE key = 'seeded'").fetchone()
+        return row is not None
+
+    def load(self):
+        """Claims in the database, plus any left in claimed_ids.json from the single-process setup"""
+        pairs = self.items()
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                pairs.extend((student_id, int(member_id)) for student_id, member_id in json.load(f).items())
+        return pairs
+
+    def save(self):
+        # Claims are already committed. Once claimed_ids.json has been merged by rebuild(),
+        # move it aside so claims released since then aren't merged back on the next start.
+        if self.legacy_path:
+            try:
+                os.replace(self.legacy_path, f"{self.legacy_path}.imported")
+            except FileNotFoundError:
+                pass
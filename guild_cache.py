@@ -0,0 +1,93 @@
+import asyncio
+
+
+class GuildObjectCache:
+    """Per-guild name -> role/channel lookups, kept fresh from gateway events.
+
+    Concurrent requests to create the same missing role or channel share one call.
+    """
+
+    def __init__(self):
+        self._roles = {}
+        self._channels = {}
+        self._inflight = {}
+
+    def _role_names(self, guild):
+        names = self._roles.get(guild.id)
+        if names is None:
+            names = {}
+            # guild.roles is ordered by position, first match wins like discord.utils.get
+            for role in guild.roles:
+                names.setdefault(role.name, role)
+            self._roles[guild.id] = names
+        return names
+
+    def _channel_names(self, guild):
+        names = self._channels.get(guild.id)
+        if names is None:
+            names = {}
+            for channel in guild.channels:
+                names.setdefault(channel.name, channel)
+            self._channels[guild.id] = names
+        return names
+
+    def role(self, guild, name):
+        return self._role_names(guild).get(name)
+
+    def channel(self, guild, name):
+        return self._channel_names(guild).get(name)
+
+    def add_role(self, role):
+        self._role_names(role.guild).setdefault(role.name, role)
+
+    def add_channel(self, channel):
+        self._channel_names(channel.guild).setdefault(channel.name, channel)
+
+    def rename_role(self, before, after):
+        names = self._role_names(after.guild)
+        if names.get(before.name) and names[before.name].id == after.id:
+            self._forget(names, before.name, after.id, after.guild.roles)
+        names.setdefault(after.name, after)
+
+    def rename_channel(self, before, after):
+        names = self._channel_names(after.guild)
+        if names.get(before.name) and names[before.name].id == after.id:
+            self._forget(names, before.name, after.id, after.guild.channels)
+        names.setdefault(after.name, after)
+
+    def remove_role(self, role):
+        names = self._role_names(role.guild)
+        if names.get(role.name) and names[role.name].id == role.id:
+            self._forget(names, role.name, role.id, role.guild.roles)
+
+    def remove_channel(self, channel):
+        names = self._channel_names(channel.guild)
+        if names.get(channel.name) and names[channel.name].id == channel.id:
+            self._forget(names, channel.name, channel.id, channel.guild.channels)
+
+    @staticmethod
+    def _forget(names, name, object_id, candidates):
+        # Fall back to another object with the same name, if there is one
+        del names[name]
+        for candidate in candidates:
+            if candidate.name == name and candidate.id != object_id:
+                names[name] = candidate
+                break
+
+    def clear(self, guild_id=None):
+        if guild_id is None:
+            self._roles.clear()
+            self._channels.clear()
+        else:
+            self._roles.pop(guild_id, None)
+            self._channels.pop(guild_id, None)
+
+    async def single_flight(self, key, create):
+        """Awaits create() once per key, callers arriving meanwhile get the same result"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(create())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller giving up doesn't cancel the creation for the others
+        return await asyncio.shield(task)
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import time
+import weakref
+
+from marks_store import MarksStore
+from records_db import StudentRecordsDB
+from roster import RosterIndex
+from section_counters import SectionCounters
+
+
+class GuildPartition:
+    """One course's data: roster, marks, claims, student records and section counts."""
+
+    def __init__(self, roster, marks_store, claims, records_db, section_counters, roster_file=None):
+        self.roster = roster
+        self.marks_store = marks_store
+        self.claims = claims
+        self.records_db = records_db
+        self.section_counters = section_counters
+        self.roster_file = roster_file
+        self.last_used = time.monotonic()
+
+    def load(self):
+        """Reads everything from disk, blocking, so it runs in the workbook executor"""
+        if self.roster_file:
+            self.roster.load_file(self.roster_file)
+        self.marks_store.reload_if_changed()
+        pairs = self.claims.load()
+        if not self.claims.seeded():
+            # Released claims stay Active in the records, so they only seed a new claims store
+            pairs += self.records_db.active_claims()
+        self.claims.rebuild(pairs)
+        self.claims.save()
+        for section, statuses in self.records_db.statuses().items():
+            self.section_counters.replace_section(section, statuses)
+        return self
+
+    def refresh(self):
+        """Picks up roster and marks files that changed on disk"""
+        if self.roster_file:
+            self.roster.reload_if_changed(self.roster_file)
+        self.marks_store.reload_if_changed()
+
+
+class GuildPartitions:
+    """Per-guild partitions listed in a JSON file, loaded on first use and dropped when idle.
+
+    The file maps guild IDs to {"roster": path, "marks": path, "records": directory}. Guilds
+    not listed share the default partition. run(path, func) runs blocking loads off the event
+    loop, make_claims(records_dir) builds the claim registry kept in a records directory and
+    on_load(guild_id, partition) is called after each load.
+    """
+
+    def __init__(self, config_path, default, run, make_claims, fallback_mapping, idle_seconds=1800, on_load=None):
+        self.config_path = config_path
+        self.default = default
+        self.run = run
+        self.make_claims = make_claims
+        self.fallback_mapping = fallback_mapping
+        self.idle_seconds = idle_seconds
+        self.on_load = on_load
+        self._config = {}
+        self._loaded = {}
+        self._loading = {}
+        # Evicted partitions live on while a handler still holds one, see evict_idle()
+        self._evicted = weakref.WeakValueDictionary()
+        self.loads = 0
+        self.evictions = 0
+        if config_path and os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                self._config = {int(guild_id): settings for guild_id, settings in json.load(f).items()}
+
+    def __len__(self):
+        return len(self._loaded)
+
+    def configured(self, guild_id):
+        return guild_id in self._config
+
+    def configured_count(self):
+        return len(self._config)
+
+    def peek(self, guild_id):
+        """The partition if it needs no loading: loaded, or the default. None otherwise."""
+        if guild_id not in self._config:
+            return self.default
+        partition = self._loaded.get(guild_id)
+        if partition is None:
+            partition = self._evicted.pop(guild_id, None)
+            if partition is None:
+                return None
+            self._loaded[guild_id] = partition
+        partition.last_used = time.monotonic()
+        return partition
+
+    async def get(self, guild_id):
+        """The guild's partition, loading it on first use"""
+        partition = self.peek(guild_id)
+        if partition is not None:
+            return partition
+
+        # Concurrent first uses share one load
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(guild_id))
+            self._loading[guild_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        return await asyncio.shield(task)
+
+    def _records_dir(self, guild_id):
+        records_dir = self._config[guild_id].get("records") or os.path.join("guilds", str(guild_id))
+        os.makedirs(records_dir, exist_ok=True)
+        return records_dir
+
+    def _build(self, guild_id):
+        settings = self._config[guild_id]
+        records_dir = self._records_dir(guild_id)
+        roster_file = settings.get("roster")
+        return GuildPartition(
+            RosterIndex({} if roster_file else self.fallback_mapping),
+            MarksStore(settings.get("marks") or os.path.join(records_dir, "markst.xlsx")),
+            self.make_claims(records_dir),
+            StudentRecordsDB(os.path.join(records_dir, "student_records.db")),
+            SectionCounters(),
+            roster_file
+        )
+
+    async def _load(self, guild_id):
+        partition = self._build(guild_id)
+        await self.run(partition.records_db.path, partition.load)
+        partition.last_used = time.monotonic()
+        self._loaded[guild_id] = partition
+        self.loads += 1
+        if self.on_load:
+            self.on_load(guild_id, partition)
+        return partition
+
+    async def release_stored_claim(self, guild_id, member_id):
+        """Frees a member's claim in the store of a guild whose partition isn't loaded, without
+        loading the rest. Returns False when the partition is, or has to be, loaded instead."""
+        if guild_id not in self._config or guild_id in self._loading or self.peek(guild_id) is not None:
+            return False
+        # Queued behind and ahead of loads of the same guild, so a load never misses the change
+        records_path = os.path.join(self._records_dir(guild_id), "student_records.db")
+        return await self.run(records_path, self._release_stored, guild_id, member_id)
+
+    async def may_hold_claim(self, guild_id, member_id):
+        """For a guild whose partition isn't loaded: whether its claims store has a claim for the
+        member, or hasn't been seeded from the records yet so it can't tell"""
+        records_path = os.path.join(self._records_dir(guild_id), "student_records.db")
+        return await self.run(records_path, self._may_hold_stored, guild_id, member_id)
+
+    def _may_hold_stored(self, guild_id, member_id):
+        claims = self.make_claims(self._records_dir(guild_id))
+        if not claims.seeded():
+            return True
+        if not claims.blocking:
+            claims.rebuild(claims.load())
+        return claims.student_for(member_id) is not None
+
+    def _release_stored(self, guild_id, member_id):
+        claims = self.make_claims(self._records_dir(guild_id))
+        if not claims.seeded():
+            # The claim only exists in the records until a load seeds the store
+            return False
+        if not claims.blocking:
+            claims.rebuild(claims.load())
+        student_id = claims.student_for(member_id)
+        if student_id:
+            claims.release(student_id, member_id)
+            claims.save()
+        return True
+
+    def loaded(self):
+        return dict(self._loaded)
+
+    def evict_idle(self):
+        """Drops partitions unused for idle_seconds, returns their guild IDs"""
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = [
+            guild_id for guild_id, partition in self._loaded.items()
+            if partition.last_used < cutoff and not partition.claims.dirty
+        ]
+        for guild_id in evicted:
+            # Partitions with unsaved claims were skipped, so there is nothing to write back. A
+            # handler may still hold the partition though, and a fresh load would give the guild a
+            # second claims registry over the same file. peek() picks it up again until it is freed.
+            self._evicted[guild_id] = self._loaded.pop(guild_id)
+        self.evictions += len(evicted)
+        return evicted
@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+
+
+class RecordJournal:
+    """Append-only log of student record updates that haven't reached their workbook yet."""
+
+    def __init__(self, path="records_journal.jsonl"):
+        self.path = path
+        self._seq = 0
+        # filename -> {student ID: latest entry}, so repeat verifications coalesce
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def pending_count(self):
+        return sum(len(entries) for entries in self._pending.values())
+
+    def add(self, filename, username, discord_id, student_id, verified_at):
+        """Queues an update in memory and returns the entry to append to disk"""
+        self._seq += 1
+        entry = {
+            "seq": self._seq,
+            "file": filename,
+            "username": username,
+            "discord_id": str(discord_id),
+            "student_id": student_id,
+            "verified_at": verified_at
+        }
+        self._pending.setdefault(filename, {})[student_id] = entry
+        return entry
+
+    def append(self, entry):
+        """Writes one entry and fsyncs it, runs off the event loop"""
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def take(self, filename):
+        """Snapshot of pending entries for one workbook, oldest first"""
+        entries = self._pending.get(filename, {})
+        return sorted(entries.values(), key=lambda entry: entry["seq"])
+
+    def files(self):
+        return [filename for filename, entries in self._pending.items() if entries]
+
+    def mark_flushed(self, filename, entries):
+        """Drops entries that were written, unless a newer update arrived meanwhile"""
+        pending = self._pending.get(filename, {})
+        for entry in entries:
+            if pending.get(entry["student_id"]) is entry:
+                del pending[entry["student_id"]]
+        if not pending:
+            self._pending.pop(filename, None)
+
+    def compact(self):
+        """Rewrites the journal with only the entries still pending"""
+        with self._lock:
+            remaining = [entry for entries in list(self._pending.values()) for entry in list(entries.values())]
+            remaining.sort(key=lambda entry: entry["seq"])
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def replay(self):
+        """Loads unflushed entries left over from a previous run. Returns how many were found."""
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    continue
+                self._seq = max(self._seq, entry["seq"])
+                self._pending.setdefault(entry["file"], {})[entry["student_id"]] = entry
+                count += 1
+        return count
@@ -0,0 +1,87 @@
+"""Starts the bot and restarts it if it exits, optionally as several sharded processes.
+
+    python launcher.py
+
+runs one process, like run_bot.sh used to. With SHARD_COUNT and SHARD_PROCESSES set,
+
+    SHARD_COUNT=8 SHARD_PROCESSES=2 python launcher.py
+
+starts 2 processes running 4 shards each. They share claims.db and student_records.db,
+so claims and records stay consistent across processes. With METRICS_PORT set, each
+process serves metrics on METRICS_PORT + its index.
+"""
+import logging
+import multiprocessing
+import os
+import time
+
+from log_pipeline import log_event, setup_logging
+
+RESTART_DELAY = 1
+
+
+def shard_slices(shard_count, processes):
+    """Splits shard IDs 0..shard_count-1 over the processes as evenly as possible"""
+    return [list(range(index, shard_count, processes)) for index in range(processes)]
+
+
+def run_worker(index, shard_count, shard_ids):
+    # bot.py reads its configuration on import, so set it up before importing
+    if shard_ids is not None:
+        os.environ['SHARD_COUNT'] = str(shard_count)
+        os.environ['SHARD_IDS'] = ",".join(str(shard_id) for shard_id in shard_ids)
+    if os.getenv('METRICS_PORT'):
+        os.environ['METRICS_PORT'] = str(int(os.environ['METRICS_PORT']) + index)
+
+    import bot
+    bot.main()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+    log_listener = setup_logging(level=os.getenv('LOG_LEVEL', 'INFO').upper(), as_json=os.getenv('LOG_FORMAT') == 'json')
+
+    processes = int(os.getenv('SHARD_PROCESSES', '1'))
+    shard_count = os.getenv('SHARD_COUNT')
+    if processes > 1:
+        if not shard_count or shard_count == 'auto':
+            raise SystemExit("SHARD_PROCESSES needs a fixed SHARD_COUNT to split the shards")
+        slices = shard_slices(int(shard_count), processes)
+    else:
+        slices = [None]
+
+    context = multiprocessing.get_context("spawn")
+    workers = {}
+
+    def start(index):
+        worker = context.Process(
+            target=run_worker,
+            args=(index, int(shard_count) if slices[index] is not None else None, slices[index]),
+            name=f"bot-{index}"
+        )
+        worker.start()
+        workers[index] = worker
+
+    for index in range(len(slices)):
+        start(index)
+        log_event("worker_started", worker=f"bot-{index}", shards=slices[index])
+
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for index, worker in list(workers.items()):
+                if not worker.is_alive():
+                    log_event("worker_restarted", logging.WARNING, worker=worker.name, exit_code=worker.exitcode)
+                    start(index)
+    except KeyboardInterrupt:
+        for worker in workers.values():
+            worker.terminate()
+        for worker in workers.values():
+            worker.join()
+    finally:
+        log_listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+log = logging.getLogger("rolebot")
+
+
+def log_event(event, level=logging.INFO, exc_info=False, **fields):
+    """Logs a structured record: an event name plus key/value fields"""
+    if log.isEnabledFor(level):
+        log.log(level, event, extra={"event": event, "fields": fields}, exc_info=exc_info)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as `time level logger event key=value ...`, or one JSON object per line"""
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        event = getattr(record, "event", None) or record.getMessage()
+        fields = getattr(record, "fields", None) or {}
+        if self.as_json:
+            data = {
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "event": event,
+                **fields
+            }
+            if record.exc_text:
+                data["exception"] = record.exc_text
+            return json.dumps(data, default=str)
+
+        parts = [self.formatTime(record), record.levelname, record.name, event]
+        parts.extend(f"{key}={json.dumps(value, default=str)}" for key, value in fields.items())
+        line = " ".join(parts)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records for the given events"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per event, records over the limit are dropped and counted"""
+
+    def __init__(self, limits):
+        super().__init__()
+        self.limits = limits
+        self._buckets = {}
+        self.suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        per_second = self.limits.get(event)
+        if per_second is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(event, (per_second, now))
+            tokens = min(per_second, tokens + (now - last) * per_second)
+            if tokens < 1:
+                self._buckets[event] = (tokens, now)
+                self.suppressed[event] = self.suppressed.get(event, 0) + 1
+                return False
+            self._buckets[event] = (tokens - 1, now)
+            return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without blocking, dropping them if the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Structured records carry their data in attributes, so only tracebacks
+        # need rendering here while the exception is still alive
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_settings(value, cast=float):
+    """Reads "event=value,event=value" settings from an environment variable"""
+    settings = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, raw = item.split("=", 1)
+            settings[key.strip()] = cast(raw.strip())
+    return settings
+
+
+def setup_logging(level="INFO", as_json=False, sampling=None, rate_limits=None, queue_size=10000):
+    """Routes all logging through a queue to a background writer thread.
+
+    Returns the listener, call its stop() on shutdown to write out what is still queued.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+    if rate_limits:
+        handler.addFilter(RateLimitFilter(rate_limits))
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(StructuredFormatter(as_json=as_json))
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+    return listener
@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+
+ALL_SECTIONS = "All"
+HISTOGRAM_BINS = 10
+
+
+def to_score(value):
+    """A marks cell as a float, NaN for blanks and text like "Absent" """
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def summarize(scores):
+    """Aggregates for one column of one section, NaNs already removed and sorted"""
+    if not len(scores):
+        return {"count": 0}
+    counts, edges = np.histogram(scores, bins=HISTOGRAM_BINS)
+    return {
+        "count": int(len(scores)),
+        "mean": float(scores.mean()),
+        "median": float(np.median(scores)),
+        "std": float(scores.std()),
+        "min": float(scores[0]),
+        "max": float(scores[-1]),
+        "histogram": (counts.tolist(), edges.tolist())
+    }
+
+
+class MarksTable:
+    """Marks for every student and assessment in a 2-D array, with ranks, percentiles and
+    per-section aggregates computed once when the sheet is loaded.
+
+    students is a list of info dicts (Name/ID/G-suit/Section), raw_marks holds each
+    student's cells for the assessments, in the same order.
+    """
+
+    def __init__(self, students, assessments, raw_marks):
+        self.assessments = list(assessments)
+        self._students = students
+        self._row_of = {info["ID"].strip(): row for row, info in enumerate(students)}
+        self._raw = raw_marks
+
+        count = len(students)
+        width = len(self.assessments)
+        self.scores = np.array(
+            [[to_score(value) for value in row] for row in raw_marks], dtype=np.float64
+        ).reshape(count, width)
+        self.ranks = np.zeros((count, width), dtype=np.int32)
+        self.percentiles = np.full((count, width), np.nan, dtype=np.float32)
+
+        section_names, codes = np.unique(np.array([info["Section"] for info in students], dtype=str), return_inverse=True)
+        self.sections = section_names.tolist()
+        self._codes = codes
+        self.stats = {}
+
+        for code, section in enumerate(self.sections):
+            rows = np.flatnonzero(codes == code)
+            self.stats[section] = [self._rank_column(rows, column) for column in range(width)]
+        self.stats[ALL_SECTIONS] = [
+            summarize(np.sort(column[~np.isnan(column)])) for column in self.scores.T
+        ]
+
+    def _rank_column(self, rows, column):
+        """Fills in ranks and percentiles of one section's students for one assessment"""
+        values = self.scores[rows, column]
+        valid = ~np.isnan(values)
+        ordered = np.sort(values[valid])
+        if len(ordered):
+            at_or_below = np.searchsorted(ordered, values[valid], side="right")
+            # Rank 1 is the highest score, ties share the best rank
+            self.ranks[rows[valid], column] = len(ordered) - at_or_below + 1
+            self.percentiles[rows[valid], column] = at_or_below * 100.0 / len(ordered)
+        return summarize(ordered)
+
+    def __len__(self):
+        return len(self._students)
+
+    def get(self, student_id):
+        """The student's details plus, per assessment, the raw mark, rank, percentile and section aggregates"""
+        row = self._row_of.get(str(student_id).strip())
+        if row is None:
+            return None
+        info = dict(self._students[row])
+        section_stats = self.stats[self.sections[self._codes[row]]]
+        results = []
+        for column, name in enumerate(self.assessments):
+            raw = self._raw[row][column]
+            result = {"name": name, "marks": str(raw) if raw is not None else "N/A"}
+            if self.ranks[row, column]:
+                stats = section_stats[column]
+                result.update(
+                    rank=int(self.ranks[row, column]),
+                    of=stats["count"],
+                    percentile=float(self.percentiles[row, column]),
+                    mean=stats["mean"],
+                    median=stats["median"]
+                )
+            results.append(result)
+        info["Assessments"] = results
+        info["Marks"] = results[0]["marks"] if results else "N/A"
+        return info
+
+    def distribution(self, section, assessment):
+        """Aggregates for one section (or ALL_SECTIONS) and assessment name, None if unknown"""
+        if section not in self.stats or assessment not in self.assessments:
+            return None
+        return self.stats[section][self.assessments.index(assessment)]
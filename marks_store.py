@@ -0,0 +1,107 @@
+import hashlib
+import io
+import os
+import threading
+
+import openpyxl
+
+from marks_analytics import MarksTable
+
+
+class MarksStore:
+    """Keeps the marks sheet parsed in memory, indexed by student ID.
+
+    Columns 5 onwards are assessments, named by the header row. Ranks and section
+    aggregates for them are computed on reload, see MarksTable.
+    """
+
+    def __init__(self, path="markst.xlsx"):
+        self.path = path
+        self._table = MarksTable([], [], [])
+        self._mtime = None
+        self._digest = None
+        self._reload_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._table)
+
+    @property
+    def table(self):
+        return self._table
+
+    def get(self, student_id):
+        # Readers only ever see a fully built table, the swap in reload() is a single assignment
+        return self._table.get(student_id)
+
+    def reload_if_changed(self):
+        """Re-parses the sheet if its mtime and content hash changed. Returns True on reload."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._reload_lock:
+            if mtime == self._mtime:
+                return False
+            with open(self.path, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest == self._digest:
+                # Touched but not modified
+                self._mtime = mtime
+                return False
+
+            self._table = self._parse(data)
+            self._mtime = mtime
+            self._digest = digest
+            return True
+
+    @staticmethod
+    def _parse(data):
+        wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            width = max(len(header), 5)
+            header += [None] * (width - len(header))
+
+            positions = {}
+            students = []
+            raw_marks = []
+            for row in rows:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                if row[0] is None:
+                    continue
+                student_id = str(row[0]).strip()
+                if not student_id:
+                    continue
+                info = {
+                    "Name": str(row[1]) if row[1] is not None else "N/A",
+                    "ID": str(row[0]),
+                    "G-suit": str(row[2]) if row[2] is not None else "N/A",
+                    "Section": str(row[3]) if row[3] is not None else "N/A"
+                }
+                # A repeated ID replaces the earlier row
+                if student_id in positions:
+                    students[positions[student_id]] = info
+                    raw_marks[positions[student_id]] = row[4:]
+                else:
+                    positions[student_id] = len(students)
+                    students.append(info)
+                    raw_marks.append(row[4:])
+        finally:
+            wb.close()
+
+        # Column 5 is always kept, later ones only if they have a header or any marks
+        columns = [
+            n for n in range(width - 4)
+            if n == 0 or header[4 + n] is not None or any(marks[n] is not None for marks in raw_marks)
+        ]
+        assessments = [
+            str(header[4 + n]).strip() if header[4 + n] is not None else f"Assessment {n + 1}"
+            for n in columns
+        ]
+        raw_marks = [tuple(marks[n] for n in columns) for marks in raw_marks]
+        return MarksTable(students, assessments, raw_marks)
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+
+class MemberCache:
+    """Keeps verified members plus the most recently active ones in discord.py's member cache.
+
+    Used when the client runs with MemberCacheFlags.none() and no startup chunking: nothing
+    is cached by the library, so members are added here as they interact. on_member_update
+    only fires for cached members, which is why verified members are pinned rather than
+    dropped with the rest of the least recently used ones.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._pinned = {}
+        self._recent = OrderedDict()
+        self.hits = 0
+        self.fetches = 0
+
+    def __len__(self):
+        return len(self._pinned) + len(self._recent)
+
+    def touch(self, member):
+        """Caches a member that just interacted, evicting the least recently active if full"""
+        key = (member.guild.id, member.id)
+        member.guild._add_member(member)
+        if key in self._pinned:
+            self._pinned[key] = member
+            return
+        self._recent[key] = member
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.capacity:
+            _, evicted = self._recent.popitem(last=False)
+            evicted.guild._remove_member(evicted)
+
+    def pin(self, member):
+        """Keeps a verified member cached until unpin() or forget()"""
+        key = (member.guild.id, member.id)
+        self._recent.pop(key, None)
+        self._pinned[key] = member
+        member.guild._add_member(member)
+
+    def unpin(self, member):
+        key = (member.guild.id, member.id)
+        if self._pinned.pop(key, None) is not None:
+            self.touch(member)
+
+    def forget(self, guild, member_id):
+        key = (guild.id, member_id)
+        member = self._pinned.pop(key, None) or self._recent.pop(key, None)
+        if member is not None:
+            guild._remove_member(member)
+
+    def clear(self, guild_id=None):
+        for store in (self._pinned, self._recent):
+            for key in [key for key in store if guild_id is None or key[0] == guild_id]:
+                member = store.pop(key)
+                member.guild._remove_member(member)
+
+    async def get_many(self, guild, member_ids):
+        """{member ID: member} for the given IDs still in the guild.
+
+        Uncached members are fetched from Discord 100 per request but not cached, so listing
+        every verified member doesn't push the recently active ones out.
+        """
+        found = {}
+        missing = []
+        for member_id in dict.fromkeys(member_ids):
+            member = guild.get_member(member_id)
+            if member is None:
+                missing.append(member_id)
+            else:
+                found[member_id] = member
+        self.hits += len(found)
+        self.fetches += len(missing)
+        for start in range(0, len(missing), 100):
+            for member in await guild.query_members(user_ids=missing[start:start + 100], cache=False):
+                found[member.id] = member
+        return found
@@ -0,0 +1,97 @@
+import os
+
+import openpyxl
+
+RECORD_HEADERS = ["Discord Username", "Discord ID", "Student ID", "Verification Date", "Status"]
+
+
+def record_rows(sheet):
+    # Read-only sheets can return short rows when trailing cells are empty
+    for row in sheet.iter_rows(min_row=2, max_col=5, values_only=True):
+        yield tuple(row) + (None,) * (5 - len(row))
+
+
+def section_number(section):
+    # Clean section name for filename (remove "Section-" prefix)
+    return section.replace("Section-", "")
+
+
+def section_filename(section):
+    return f"students{section_number(section)}.xlsx"
+
+
+def filename_section(filename):
+    return filename.replace("students", "").replace(".xlsx", "")
+
+
+def section_files():
+    """All students*.xlsx files in the working directory"""
+    return [f for f in os.listdir() if f.startswith("students") and f.endswith(".xlsx")]
+
+
+def apply_student_records(filename, entries):
+    """Writes a batch of journal entries to a section workbook with a single save"""
+    # Check if file exists, if not start a new one with headers
+    if os.path.exists(filename):
+        wb = openpyxl.load_workbook(filename)
+        sheet = wb.active
+    else:
+        wb = openpyxl.Workbook()
+        sheet = wb.active
+        sheet.append(RECORD_HEADERS)
+
+    # Index existing rows by Student ID once instead of scanning per entry
+    rows = {}
+    for row in sheet.iter_rows(min_row=2):
+        if row[2].value is not None:
+            rows.setdefault(str(row[2].value), row)
+
+    for entry in entries:
+        row = rows.get(entry["student_id"])
+        if row:
+            # Update existing record
+            row[0].value = entry["username"]  # Discord Username
+            row[1].value = entry["discord_id"]  # Discord ID
+            row[4].value = "Active"  # Status
+        else:
+            # Add new record
+            sheet.append([
+                entry["username"],  # Discord Username
+                entry["discord_id"],  # Discord ID
+                entry["student_id"],  # Student ID
+                entry["verified_at"],  # Verification Date
+                "Active"  # Status
+            ])
+            rows[entry["student_id"]] = sheet[sheet.max_row]
+
+    # Save to a temp file and rename so readers never see a half-written workbook
+    directory, name = os.path.split(filename)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    wb.save(tmp_path)
+    os.replace(tmp_path, filename)
+
+
+def read_statuses(filename):
+    """{Student ID: active?} for every registered student in a section workbook"""
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        statuses = {}
+        for row in record_rows(wb.active):
+            if row[0] and row[2] is not None:  # If there's a username
+                statuses[str(row[2]).strip()] = row[4] == "Active"
+        return statuses
+    finally:
+        wb.close()
+
+
+def read_active_claims(filename):
+    """(Student ID, Discord ID) pairs for active students in a section workbook"""
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        pairs = []
+        for row in record_rows(wb.active):
+            if row[1] and row[2] and row[4] == "Active":
+                pairs.append((str(row[2]).strip(), int(row[1])))
+        return pairs
+    finally:
+        wb.close()
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+
+import openpyxl
+
+from records import RECORD_HEADERS, record_rows
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    section TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    discord_username TEXT,
+    discord_id TEXT,
+    verified_at TEXT,
+    status TEXT NOT NULL DEFAULT 'Active',
+    PRIMARY KEY (section, student_id)
+);
+CREATE INDEX IF NOT EXISTS students_student_id ON students (student_id);
+CREATE INDEX IF NOT EXISTS students_discord_id ON students (discord_id);
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class StudentRecordsDB:
+    """Student records in SQLite, one connection per worker thread."""
+
+    def __init__(self, path="student_records.db"):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, section, username, discord_id, student_id, verified_at):
+        """Adds a student or marks an existing one active under a new Discord account"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO students (section, student_id, discord_username, discord_id, verified_at, status)
+                VALUES (?, ?, ?, ?, ?, 'Active')
+                ON CONFLICT (section, student_id) DO UPDATE SET
+                    discord_username = excluded.discord_username,
+                    discord_id = excluded.discord_id,
+                    status = 'Active'
+                """,
+                (section, student_id, username, str(discord_id), verified_at)
+            )
+
+    def statuses(self):
+        """{section: {Student ID: active?}} for every registered student"""
+        rows = self._connect().execute("""
+            SELECT section, student_id, status = 'Active' FROM students
+            WHERE discord_username IS NOT NULL AND discord_username != ''
+        """)
+        statuses = {}
+        for section, student_id, active in rows:
+            statuses.setdefault(section, {})[student_id] = bool(active)
+        return statuses
+
+    def active_claims(self):
+        """(Student ID, Discord ID) pairs for every active student"""
+        rows = self._connect().execute(
+            "SELECT student_id, discord_id FROM students WHERE status = 'Active' AND discord_id IS NOT NULL"
+        )
+        return [(student_id, int(discord_id)) for student_id, discord_id in rows]
+
+    def import_workbook(self, filename, section):
+        """One-time import of a students*.xlsx file. Returns rows imported, or None if already done."""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM imported_files WHERE filename = ?", (filename,)).fetchone():
+            return None
+
+        wb = openpyxl.load_workbook(filename, read_only=True)
+        try:
+            rows = []
+            for row in record_rows(wb.active):
+                if row[2] is None:
+                    continue
+                rows.append((
+                    section,
+                    str(row[2]).strip(),
+                    row[0],
+                    str(row[1]) if row[1] is not None else None,
+                    str(row[3]) if row[3] is not None else None,
+                    row[4] or "Active"
+                ))
+        finally:
+            wb.close()
+
+        with conn:
+            # Another process sharing the database may have imported it meanwhile
+            claimed = conn.execute("INSERT OR IGNORE INTO imported_files (filename) VALUES (?)", (filename,))
+            if claimed.rowcount == 0:
+                return None
+            # Rows already in the database win over the spreadsheet
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO students (section, student_id, discord_username, discord_id, verified_at, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+        return len(rows)
+
+    def export_workbook(self, filename, section=None):
+        """Streams records into an xlsx file, one sheet per section. Returns the row count."""
+        conn = self._connect()
+        query = """
+            SELECT section, discord_username, discord_id, student_id, verified_at, status
+            FROM students
+        """
+        params = ()
+        if section is not None:
+            query += " WHERE section = ?"
+            params = (section,)
+        query += " ORDER BY section, verified_at"
+
+        # Write-only mode keeps just the current row in memory
+        wb = openpyxl.Workbook(write_only=True)
+        sheet = None
+        current_section = None
+        count = 0
+        for row in conn.execute(query, params):
+            if sheet is None or row[0] != current_section:
+                current_section = row[0]
+                sheet = wb.create_sheet(title=f"Section {current_section}"[:31])
+                sheet.append(RECORD_HEADERS)
+            sheet.append(list(row[1:]))
+            count += 1
+        if sheet is None:
+            sheet = wb.create_sheet(title="Students")
+            sheet.append(RECORD_HEADERS)
+
+        directory, name = os.path.split(filename)
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        wb.save(tmp_path)
+        os.replace(tmp_path, filename)
+        return count
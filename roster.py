@@ -0,0 +1,205 @@
+import csv
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+import openpyxl
+
+# Largest ID the signed 64-bit array can hold
+MAX_NUMERIC_ID = 2 ** 63 - 1
+
+
+def read_roster_file(path):
+    """Yields (Student ID, role, channel) rows from a CSV or xlsx roster.
+
+    Columns are found by the headers "Student ID", "Role" and "Channel", falling
+    back to the first three columns when there is no header row.
+    """
+    if path.lower().endswith(".xlsx"):
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from _roster_rows(wb.active.iter_rows(values_only=True))
+        finally:
+            wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from _roster_rows(csv.reader(f))
+
+
+def _roster_rows(rows):
+    columns = (0, 1, 2)
+    for row_number, row in enumerate(rows):
+        cells = [str(cell).strip() if cell is not None else "" for cell in row]
+        if row_number == 0:
+            headers = [cell.lower() for cell in cells]
+            if "role" in headers:
+                id_column = next((i for i, h in enumerate(headers) if h in ("student id", "id")), 0)
+                channel_column = headers.index("channel") if "channel" in headers else None
+                columns = (id_column, headers.index("role"), channel_column)
+                continue
+        if not any(cells):
+            continue
+        # Short rows are padded up to the furthest column the header points at
+        cells += [""] * (max(column for column in columns if column is not None) + 1 - len(cells))
+        student_id = cells[columns[0]]
+        role = cells[columns[1]]
+        channel = cells[columns[2]] if columns[2] is not None else ""
+        if student_id and role:
+            yield student_id, role, channel or None
+
+
+def numeric_id(student_id):
+    """The ID as an int if it is plain ASCII digits without leading zeros, otherwise None.
+
+    str.isdigit() alone accepts characters like '²' that int() rejects.
+    """
+    if not (student_id.isascii() and student_id.isdigit()) or str(int(student_id)) != student_id:
+        return None
+    number = int(student_id)
+    return number if number <= MAX_NUMERIC_ID else None
+
+
+class RosterIndex:
+    """Student ID -> role/channel lookups, built from ID_MAPPING or a roster file.
+
+    Numeric IDs are stored as a sorted array of integers with a parallel array of
+    indexes into a small table of interned (role, channel) entries, so 30k+ IDs take
+    a few hundred KB instead of a dict per ID. IDs that don't round-trip through int
+    (leading zeros, letters) go in a plain dict.
+    """
+
+    def __init__(self, mapping):
+        self.source_path = None
+        self.source_mtime = None
+        self.load_seconds = 0.0
+        self.load(mapping)
+
+    def load(self, mapping):
+        """Rebuilds the index from a mapping or (ID, role, channel) rows and swaps it in at once."""
+        started = time.perf_counter()
+        if isinstance(mapping, dict):
+            rows = ((student_id, data["role"], data.get("channel")) for student_id, data in mapping.items())
+        else:
+            rows = mapping
+
+        entries = []
+        entry_numbers = {}
+        pairs = []
+        other_ids = {}
+        for student_id, role, channel in rows:
+            student_id = str(student_id).strip()
+            key = (role, channel)
+            entry_number = entry_numbers.get(key)
+            if entry_number is None:
+                entry_number = entry_numbers[key] = len(entries)
+                entries.append({
+                    "role": sys.intern(role),
+                    "channel": sys.intern(channel) if channel else None
+                })
+            number = numeric_id(student_id)
+            if number is not None:
+                pairs.append((number, entry_number))
+            else:
+                other_ids[student_id] = entry_number
+
+        # Later rows win for repeated IDs, like dict assignment would
+        pairs.sort(key=lambda pair: pair[0])
+        ids = array("q")
+        entry_of = array("I")
+        for number, entry_number in pairs:
+            if ids and ids[-1] == number:
+                entry_of[-1] = entry_number
+            else:
+                ids.append(number)
+                entry_of.append(entry_number)
+
+        # Per-role ID lists as one array grouped by role. Values are positions in `ids`,
+        # or -1 - n for the nth non-numeric ID.
+        other_list = list(other_ids)
+        role_counts = {}
+        for entry_number in chain(entry_of, other_ids.values()):
+            role = entries[entry_number]["role"]
+            role_counts[role] = role_counts.get(role, 0) + 1
+        role_offsets = {}
+        offset = 0
+        for role, count in role_counts.items():
+            role_offsets[role] = [offset, offset]
+            offset += count
+        by_role = array("i", bytes(4 * offset))
+        for position, entry_number in enumerate(entry_of):
+            bounds = role_offsets[entries[entry_number]["role"]]
+            by_role[bounds[1]] = position
+            bounds[1] += 1
+        for n, student_id in enumerate(other_list):
+            bounds = role_offsets[entries[other_ids[student_id]]["role"]]
+            by_role[bounds[1]] = -1 - n
+            bounds[1] += 1
+        role_offsets = {role: tuple(bounds) for role, bounds in role_offsets.items()}
+
+        self._state = (ids, entry_of, entries, other_ids, other_list, by_role, role_offsets)
+        self.load_seconds = time.perf_counter() - started
+
+    def load_file(self, path):
+        """Loads a CSV/xlsx roster and remembers its mtime for reload_if_changed"""
+        mtime = os.stat(path).st_mtime_ns
+        self.load(read_roster_file(path))
+        self.source_path = path
+        self.source_mtime = mtime
+
+    def reload_if_changed(self, path):
+        """Reloads the roster file if it changed since the last load. Returns True on reload."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if path == self.source_path and mtime == self.source_mtime:
+            return False
+        self.load_file(path)
+        return True
+
+    def memory_bytes(self):
+        """Approximate size of the index structures"""
+        ids, entry_of, entries, other_ids, other_list, by_role, role_offsets = self._state
+        size = sys.getsizeof(ids) + sys.getsizeof(entry_of) + sys.getsizeof(entries)
+        size += sum(sys.getsizeof(entry) for entry in entries)
+        size += sys.getsizeof(other_ids) + sys.getsizeof(other_list)
+        size += sum(sys.getsizeof(student_id) for student_id in other_list)
+        size += sys.getsizeof(by_role) + sys.getsizeof(role_offsets)
+        return size
+
+    def __len__(self):
+        ids, entry_of, entries, other_ids, other_list, by_role, role_offsets = self._state
+        return len(ids) + len(other_ids)
+
+    def __contains__(self, student_id):
+        return self.lookup(student_id) is not None
+
+    def lookup(self, student_id):
+        ids, entry_of, entries, other_ids, other_list, by_role, role_offsets = self._state
+        student_id = str(student_id).strip()
+        number = numeric_id(student_id)
+        if number is not None:
+            position = bisect_left(ids, number)
+            if position < len(ids) and ids[position] == number:
+                return entries[entry_of[position]]
+            return None
+        entry_number = other_ids.get(student_id)
+        return entries[entry_number] if entry_number is not None else None
+
+    def ids_for_role(self, role_name):
+        ids, entry_of, entries, other_ids, other_list, by_role, role_offsets = self._state
+        start, end = role_offsets.get(role_name, (0, 0))
+        return tuple(
+            str(ids[position]) if position >= 0 else other_list[-1 - position]
+            for position in by_role[start:end]
+        )
+
+    def role_size(self, role_name):
+        start, end = self._state[6].get(role_name, (0, 0))
+        return end - start
+
+    def is_roster_role(self, role_name):
+        return role_name in self._state[6]
@@ -1,4 +1,2 @@
 @echo off
-:start
-python bot.py
-goto start 
\ No newline at end of file
+python launcher.py
@@ -1,5 +1,2 @@
 #!/bin/bash
-while true; do
-    python bot.py
-    sleep 1
-done 
\ No newline at end of file
+python launcher.py
@@ -0,0 +1,57 @@
+class SectionCounters:
+    """Per-section registered/active counts kept in memory."""
+
+    def __init__(self):
+        # section -> {student ID: active?}
+        self._statuses = {}
+        # section -> [total registered, active]
+        self._totals = {}
+        self._fingerprints = {}
+
+    def __len__(self):
+        return len(self._totals)
+
+    def replace_section(self, section, statuses):
+        """Resets a section's counts from a full read of its records"""
+        statuses = dict(statuses)
+        self._statuses[section] = statuses
+        self._totals[section] = [len(statuses), sum(1 for active in statuses.values() if active)]
+
+    def remove_section(self, section):
+        self._statuses.pop(section, None)
+        self._totals.pop(section, None)
+
+    def sections(self):
+        return list(self._totals)
+
+    def record_active(self, section, student_id):
+        """Counts a verification, new students add to both totals"""
+        statuses = self._statuses.setdefault(section, {})
+        totals = self._totals.setdefault(section, [0, 0])
+        previous = statuses.get(student_id)
+        if previous is None:
+            totals[0] += 1
+            totals[1] += 1
+        elif not previous:
+            totals[1] += 1
+        statuses[student_id] = True
+
+    def counts(self, section=None):
+        """{section: (total registered, active)}, sorted by section"""
+        if section is not None:
+            totals = self._totals.get(section)
+            return {section: tuple(totals)} if totals else {}
+        return {name: tuple(self._totals[name]) for name in sorted(self._totals)}
+
+    def has_changed(self, source, fingerprint):
+        """True the first time a source's fingerprint differs from the last one seen"""
+        if self._fingerprints.get(source) == fingerprint:
+            return False
+        self._fingerprints[source] = fingerprint
+        return True
+
+    def forget(self, source):
+        self._fingerprints.pop(source, None)
+
+    def sources(self):
+        return list(self._fingerprints)
@@ -0,0 +1,26 @@
+from bulk_import import parse_assignments, parse_user
+
+
+def test_header_row_is_skipped():
+    data = b"Discord User,Student ID\n123456789012345678,1001\n"
+    assert parse_assignments("students.csv", data) == [(2, "123456789012345678", "1001")]
+
+
+def test_first_row_with_a_non_numeric_id_is_kept():
+    data = b"123456789012345678,A1001\n<@223456789012345678>,A1002\n"
+    assert parse_assignments("students.csv", data) == [
+        (1, "123456789012345678", "A1001"),
+        (2, "<@223456789012345678>", "A1002"),
+    ]
+
+
+def test_blank_rows_are_skipped_and_short_rows_kept():
+    data = b"alice,1001\n\n,\nbob\n"
+    assert parse_assignments("students.csv", data) == [(1, "alice", "1001"), (4, "bob", "")]
+
+
+def test_parse_user():
+    assert parse_user("<@!123>") == 123
+    assert parse_user("123") == 123
+    assert parse_user("alice") is None
+    assert parse_user("1²") is None
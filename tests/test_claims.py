@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from claims import ClaimRegistry, SqliteClaimRegistry
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def make_registry(request, tmp_path):
+    def make():
+        if request.param == "sqlite":
+            return SqliteClaimRegistry(str(tmp_path / "claims.db"), legacy_path=str(tmp_path / "claimed_ids.json"))
+        return ClaimRegistry(str(tmp_path / "claimed_ids.json"))
+    return make
+
+
+def start(registry, records):
+    """What on_ready does: records only seed a store that was never saved"""
+    pairs = registry.load()
+    if not registry.seeded():
+        pairs += records
+    registry.rebuild(pairs)
+    registry.save()
+
+
+def test_claim_and_release(make_registry):
+    registry = make_registry()
+    assert registry.claim("1001", 42)
+    assert registry.claim(" 1001 ", 42)
+    assert not registry.claim("1001", 99)
+    assert registry.owner_of("1001") == 42
+    assert registry.student_for(42) == "1001"
+
+    assert not registry.release("1001", 99)
+    assert registry.release("1001", 42)
+    assert registry.owner_of("1001") is None
+    assert registry.student_for(42) is None
+    assert registry.claim("1001", 99)
+
+
+def test_claiming_a_new_id_frees_the_old_one(make_registry):
+    registry = make_registry()
+    registry.claim("1001", 42)
+    registry.claim("1002", 42)
+    assert registry.owner_of("1001") is None
+    assert registry.student_for(42) == "1002"
+    assert len(registry) == 1
+
+
+def test_rebuild_first_claim_wins(tmp_path):
+    registry = ClaimRegistry(str(tmp_path / "claimed_ids.json"))
+    registry.rebuild([("1001", 42), ("1001", 99), ("1002", "42"), ("1003", 7)])
+    assert sorted(registry.items()) == [("1001", 42), ("1003", 7)]
+
+
+def test_saved_claims_load_back(make_registry):
+    registry = make_registry()
+    registry.claim("1001", 42)
+    registry.save()
+    reloaded = make_registry()
+    start(reloaded, [])
+    assert reloaded.owner_of("1001") == 42
+
+
+def test_records_seed_a_new_store(make_registry):
+    registry = make_registry()
+    assert not registry.seeded()
+    start(registry, [("1001", 42)])
+    assert registry.seeded()
+    assert registry.owner_of("1001") == 42
+
+
+def test_released_claims_stay_released_after_restart(make_registry):
+    # The released student's record is still Active, as it is after a member leaves
+    records = [("1001", 42)]
+    registry = make_registry()
+    start(registry, records)
+    registry.release("1001", 42)
+    registry.save()
+
+    restarted = make_registry()
+    start(restarted, records)
+    assert restarted.owner_of("1001") is None
+    assert restarted.claim("1001", 99)
+
+
+def test_sqlite_imports_legacy_json_once(tmp_path):
+    legacy = tmp_path / "claimed_ids.json"
+    legacy.write_text(json.dumps({"1001": "42"}), encoding="utf-8")
+    registry = SqliteClaimRegistry(str(tmp_path / "claims.db"), legacy_path=str(legacy))
+    # The JSON file was the claims store, so the records don't seed it
+    start(registry, [("2002", 7)])
+    assert registry.owner_of("1001") == 42
+    assert registry.owner_of("2002") is None
+    assert not legacy.exists()
+
+    registry.release("1001", 42)
+    restarted = SqliteClaimRegistry(str(tmp_path / "claims.db"), legacy_path=str(legacy))
+    start(restarted, [("2002", 7)])
+    assert restarted.owner_of("1001") is None
+
+
+def test_sqlite_claims_are_shared_between_registries(tmp_path):
+    first = SqliteClaimRegistry(str(tmp_path / "claims.db"), legacy_path=None)
+    second = SqliteClaimRegistry(str(tmp_path / "claims.db"), legacy_path=None)
+    assert first.claim("1001", 42)
+    assert not second.claim("1001", 99)
+    assert second.owner_of("1001") == 42
+
+
+def test_changes_mark_the_json_registry_dirty_until_saved(tmp_path):
+    registry = ClaimRegistry(str(tmp_path / "claimed_ids.json"))
+    assert not registry.dirty
+    registry.claim("1001", 42)
+    assert registry.dirty
+    registry.save()
+    assert not registry.dirty
+    assert not registry.release("1001", 99)
+    assert not registry.dirty
+    registry.release("1001", 42)
+    assert registry.dirty
@@ -0,0 +1,81 @@
+import json
+
+from journal import RecordJournal
+
+
+def add(journal, filename, student_id, username="user"):
+    entry = journal.add(filename, username, 42, student_id, "2024-09-01 10:00:00")
+    journal.append(entry)
+    return entry
+
+
+def test_repeat_updates_coalesce_per_student(tmp_path):
+    journal = RecordJournal(str(tmp_path / "journal.jsonl"))
+    add(journal, "students1.xlsx", "1001", "old")
+    add(journal, "students1.xlsx", "1002")
+    add(journal, "students1.xlsx", "1001", "new")
+    add(journal, "students2.xlsx", "2001")
+
+    entries = journal.take("students1.xlsx")
+    assert [entry["student_id"] for entry in entries] == ["1002", "1001"]
+    assert entries[1]["username"] == "new"
+    assert journal.pending_count() == 3
+    assert sorted(journal.files()) == ["students1.xlsx", "students2.xlsx"]
+
+
+def test_mark_flushed_keeps_newer_updates(tmp_path):
+    journal = RecordJournal(str(tmp_path / "journal.jsonl"))
+    add(journal, "students1.xlsx", "1001", "old")
+    entries = journal.take("students1.xlsx")
+    # Arrives while the batch is being written
+    add(journal, "students1.xlsx", "1001", "new")
+    journal.mark_flushed("students1.xlsx", entries)
+    assert [entry["username"] for entry in journal.take("students1.xlsx")] == ["new"]
+
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = RecordJournal(str(path))
+    add(journal, "students1.xlsx", "1001")
+    add(journal, "students1.xlsx", "1002")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "file": "students1.xlsx", "stu')
+
+    restarted = RecordJournal(str(path))
+    assert restarted.replay() == 2
+    assert [entry["student_id"] for entry in restarted.take("students1.xlsx")] == ["1001", "1002"]
+    # New entries continue after the replayed ones
+    assert restarted.add("students1.xlsx", "user", 42, "1003", "now")["seq"] == 3
+
+
+def test_replay_without_a_journal(tmp_path):
+    assert RecordJournal(str(tmp_path / "missing.jsonl")).replay() == 0
+
+
+def test_compact_keeps_only_pending_entries(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = RecordJournal(str(path))
+    add(journal, "students1.xlsx", "1001")
+    add(journal, "students2.xlsx", "2001")
+    journal.mark_flushed("students1.xlsx", journal.take("students1.xlsx"))
+    journal.compact()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [entry["student_id"] for entry in lines] == ["2001"]
+
+    restarted = RecordJournal(str(path))
+    assert restarted.replay() == 1
+    assert restarted.files() == ["students2.xlsx"]
+
+
+def test_compact_after_a_torn_line_drops_it(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = RecordJournal(str(path))
+    add(journal, "students1.xlsx", "1001")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "fi')
+
+    restarted = RecordJournal(str(path))
+    restarted.replay()
+    restarted.compact()
+    assert [json.loads(line)["student_id"] for line in path.read_text(encoding="utf-8").splitlines()] == ["1001"]
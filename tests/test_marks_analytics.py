@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from marks_analytics import ALL_SECTIONS, MarksTable, to_score
+
+
+def student(student_id, section):
+    return {"Name": f"Student {student_id}", "ID": student_id, "G-suit": "", "Section": section}
+
+
+def make_table():
+    students = [student("1", "A"), student("2", "A"), student("3", "A"), student("4", "B"), student("5", "B")]
+    raw = [[10, "Absent"], [20, 5], [20, 7], [30, None], [5, 9]]
+    return MarksTable(students, ["Quiz 1", "Quiz 2"], raw)
+
+
+def test_to_score():
+    assert to_score(7) == 7.0
+    assert to_score("7.5") == 7.5
+    assert math.isnan(to_score(None))
+    assert math.isnan(to_score("Absent"))
+    assert math.isnan(to_score(True))
+
+
+def test_ranks_are_per_section_and_ties_share_the_best_rank():
+    table = make_table()
+    quiz1 = [table.get(student_id)["Assessments"][0] for student_id in "123"]
+    assert [result["rank"] for result in quiz1] == [3, 1, 1]
+    assert all(result["of"] == 3 for result in quiz1)
+    assert table.get("4")["Assessments"][0]["rank"] == 1
+    assert table.get("5")["Assessments"][0]["rank"] == 2
+
+
+def test_percentiles():
+    table = make_table()
+    assert table.get("1")["Assessments"][0]["percentile"] == pytest.approx(100 / 3)
+    assert table.get("2")["Assessments"][0]["percentile"] == 100.0
+
+
+def test_missing_marks_have_no_rank():
+    table = make_table()
+    result = table.get("1")["Assessments"][1]
+    assert result == {"name": "Quiz 2", "marks": "Absent"}
+    assert table.get("4")["Assessments"][1]["marks"] == "N/A"
+    assert table.get("2")["Assessments"][1]["rank"] == 2
+    assert table.get("2")["Assessments"][1]["of"] == 2
+
+
+def test_section_and_overall_aggregates():
+    table = make_table()
+    section_a = table.distribution("A", "Quiz 1")
+    assert section_a["count"] == 3
+    assert section_a["mean"] == pytest.approx(50 / 3)
+    assert section_a["median"] == 20.0
+    assert (section_a["min"], section_a["max"]) == (10.0, 20.0)
+    counts, edges = section_a["histogram"]
+    assert sum(counts) == 3 and len(edges) == len(counts) + 1
+
+    overall = table.distribution(ALL_SECTIONS, "Quiz 2")
+    assert overall["count"] == 3
+    assert overall["median"] == 7.0
+    assert table.distribution("B", "Quiz 2")["count"] == 1
+
+
+def test_unknown_lookups():
+    table = make_table()
+    assert table.get("99") is None
+    assert table.distribution("C", "Quiz 1") is None
+    assert table.distribution("A", "Quiz 9") is None
+
+
+def test_get_keeps_student_details_and_first_mark():
+    info = make_table().get(" 2 ")
+    assert info["Name"] == "Student 2"
+    assert info["Marks"] == "20"
+    assert len(info["Assessments"]) == 2
+    assert len(make_table()) == 5
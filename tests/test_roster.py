@@ -0,0 +1,112 @@
+from roster import RosterIndex, read_roster_file
+
+
+def mapping(**roles):
+    return {student_id: {"role": role, "channel": None} for student_id, role in roles.items()}
+
+
+def test_lookup_numeric_and_other_ids():
+    index = RosterIndex({
+        "22101001": {"role": "Section-1", "channel": "sec-1"},
+        "0042": {"role": "Section-2"},
+        "AB-7": {"role": "Section-2"},
+    })
+    assert index.lookup("22101001") == {"role": "Section-1", "channel": "sec-1"}
+    assert index.lookup(" 22101001 ") == {"role": "Section-1", "channel": "sec-1"}
+    assert index.lookup(22101001)["role"] == "Section-1"
+    # Leading zeros must not collapse onto the number 42
+    assert index.lookup("0042")["role"] == "Section-2"
+    assert index.lookup("42") is None
+    assert index.lookup("AB-7")["role"] == "Section-2"
+    assert index.lookup("22101002") is None
+    assert len(index) == 3
+
+
+def test_lookup_rejects_non_ascii_digits():
+    index = RosterIndex(mapping(**{"1234": "Section-1"}))
+    assert index.lookup("1²34") is None
+    assert index.lookup("١٢٣٤") is None
+    assert "1²34" not in index
+
+
+def test_ids_too_large_for_the_array_still_work():
+    big = "9" * 25
+    index = RosterIndex(mapping(**{big: "Section-1"}))
+    assert index.lookup(big)["role"] == "Section-1"
+    assert index.ids_for_role("Section-1") == (big,)
+
+
+def test_later_rows_override_repeated_ids():
+    index = RosterIndex([
+        ("1001", "Section-1", None),
+        ("X1", "Section-1", None),
+        ("1001", "Section-2", "sec-2"),
+        ("X1", "Section-3", None),
+    ])
+    assert index.lookup("1001") == {"role": "Section-2", "channel": "sec-2"}
+    assert index.lookup("X1")["role"] == "Section-3"
+    assert len(index) == 2
+    assert index.role_size("Section-1") == 0
+    assert index.ids_for_role("Section-2") == ("1001",)
+
+
+def test_role_groups_mix_numeric_and_other_ids():
+    index = RosterIndex([
+        ("300", "Section-1", None),
+        ("A-2", "Section-1", None),
+        ("100", "Section-1", None),
+        ("200", "Section-2", None),
+        ("007", "Section-2", None),
+    ])
+    assert index.role_size("Section-1") == 3
+    assert sorted(index.ids_for_role("Section-1")) == ["100", "300", "A-2"]
+    assert sorted(index.ids_for_role("Section-2")) == ["007", "200"]
+    assert index.role_size("Section-9") == 0
+    assert index.ids_for_role("Section-9") == ()
+    assert index.is_roster_role("Section-2")
+    assert not index.is_roster_role("Section-9")
+
+
+def test_entries_are_shared_between_ids():
+    index = RosterIndex(mapping(**{"1": "Section-1", "2": "Section-1"}))
+    assert index.lookup("1") is index.lookup("2")
+
+
+def test_roster_file_with_headers_and_reload(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("Channel,Role,Student ID\nsec-1,Section-1,1001\n,Section-2,1002\n", encoding="utf-8")
+    assert list(read_roster_file(str(path))) == [("1001", "Section-1", "sec-1"), ("1002", "Section-2", None)]
+
+    index = RosterIndex({})
+    index.load_file(str(path))
+    assert index.lookup("1002")["role"] == "Section-2"
+    assert not index.reload_if_changed(str(path))
+
+    path.write_text("Student ID,Role\n1003,Section-3\n", encoding="utf-8")
+    index.source_mtime -= 1
+    assert index.reload_if_changed(str(path))
+    assert index.lookup("1001") is None
+    assert index.lookup("1003")["role"] == "Section-3"
+
+
+def test_roster_file_without_header(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("1001,Section-1,sec-1\n1002,Section-2\n", encoding="utf-8")
+    assert list(read_roster_file(str(path))) == [("1001", "Section-1", "sec-1"), ("1002", "Section-2", None)]
+
+
+def test_roster_file_with_columns_past_the_third_and_short_rows(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(
+        "Student ID,Name,Email,Role,Channel\n"
+        "1001,Bob,b@x,Section-1,section-1\n"
+        "\n"
+        "1002,Ann\n"
+        "1003,Cy,c@x,Section-2\n"
+        ",,,,\n",
+        encoding="utf-8"
+    )
+    assert list(read_roster_file(str(path))) == [("1001", "Section-1", "section-1"), ("1003", "Section-2", None)]
+    index = RosterIndex({})
+    index.load_file(str(path))
+    assert len(index) == 2
@@ -0,0 +1,34 @@
+import asyncio
+
+
+class UpdateCoalescer:
+    """Collects updates by key and hands the latest one per key to handle_batch after a delay.
+
+    A burst of updates for the same key within `delay` seconds becomes a single entry in
+    one batch. handle_batch(batch) is awaited with a {key: value} dict.
+    """
+
+    def __init__(self, delay, handle_batch):
+        self.delay = delay
+        self.handle_batch = handle_batch
+        self._pending = {}
+        self._task = None
+        self.received = 0
+        self.flushed = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, key, value):
+        self.received += 1
+        self._pending[key] = value
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.delay)
+        # Updates arriving while the batch runs start the next batch
+        batch, self._pending = self._pending, {}
+        self._task = None
+        self.flushed += len(batch)
+        await self.handle_batch(batch)
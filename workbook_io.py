@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkbookExecutor:
+    """Runs blocking workbook work on a bounded thread pool, one job at a time per file."""
+
+    def __init__(self, max_workers=4, on_job=None):
+        # on_job(function name, seconds) is called after each job, e.g. to record metrics
+        self.on_job = on_job
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workbook")
+        self._locks = {}
+        self._pending = {}
+        self.max_workers = max_workers
+
+    def queue_depth(self):
+        """Number of jobs submitted but not finished yet"""
+        return sum(self._pending.values())
+
+    def pending_by_file(self):
+        return {path: count for path, count in self._pending.items() if count}
+
+    async def run(self, path, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on the pool, after any earlier job on the same file"""
+        key = os.path.abspath(path)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        self._pending[key] = self._pending.get(key, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._done(key)
+            raise
+        started = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            lock.release()
+            self._done(key)
+            raise
+        # The file stays locked until the job itself finishes, even if the caller is
+        # cancelled meanwhile, so the next job on it can't overlap a running one
+        name = getattr(func, "__name__", "job")
+        future.add_done_callback(lambda f: self._finished(key, lock, f, name, started))
+        return await asyncio.shield(future)
+
+    def _finished(self, key, lock, future, name, started):
+        if not future.cancelled():
+            # Marks the exception retrieved when no caller is left to see it
+            future.exception()
+        lock.release()
+        if self.on_job:
+            self.on_job(name, time.perf_counter() - started)
+        self._done(key)
+
+    def _done(self, key):
+        self._pending[key] -= 1
+        if not self._pending[key]:
+            # Nothing holds or waits for the lock, so drop it, keys like temp paths are one-off
+            del self._pending[key]
+            del self._locks[key]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)